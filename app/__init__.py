@@ -1,12 +1,19 @@
 from flask import Flask, render_template, session
 from app.extensions import db, login_manager
+from app import database, instrumentation
 from app.auth import auth_bp
 from app.main import main_bp
 from app.tweets import tweets_bp
+from app.tweets.enrichment import enrichment_worker
+from app.tweets import backends, batching, model_cache, model_manager, inference
+from app.activity import activity_tracker
+from app.trending import trending
+from app.auth import identity
+from app import fragments, watermark  # noqa: F401 (watermark registers session events)
 from flask_bootstrap import Bootstrap
 from flask_migrate import Migrate
 from flask_login import current_user
-from datetime import datetime, timedelta
+from datetime import timedelta
 import os
 
 
@@ -16,47 +23,148 @@ class Application:
         self.configure_app()
         self.init_extensions()
         self.register_blueprints()
+        self.register_commands()
         self.setup_callbacks()
+        self.preload_models()
 
     def configure_app(self):
         self.app.secret_key = 'key'
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///tweets.db'
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///tweets.db')
+        self.app.config['SQLALCHEMY_ENGINE_OPTIONS'] = database.engine_options(self.app.config['SQLALCHEMY_DATABASE_URI'])
         self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+        self.app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+        self.app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+        self.app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+        self.app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
         self.app.config['UPLOAD_FOLDER'] = os.path.join(self.app.root_path, 'static', 'uploads')
         self.app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024
         self.app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif'}
+        self.app.config['IMAGE_FORMAT'] = os.environ.get('IMAGE_FORMAT', 'WEBP')  # or JPEG
+        self.app.config['IMAGE_QUALITY'] = 80
+        self.app.config['IMAGE_THUMB_SIZE'] = (600, 600)
+        self.app.config['IMAGE_DISPLAY_SIZE'] = (1600, 1600)
+        self.app.config['TWEETS_PER_PAGE'] = 20
+        self.app.config['MAX_TWEETS_PER_PAGE'] = 100
+        self.app.config['ENRICHMENT_WORKERS'] = int(os.environ.get('ENRICHMENT_WORKERS', 1))
+        self.app.config['ENRICHMENT_POLL_INTERVAL'] = 2.0
+        self.app.config['ENRICHMENT_MAX_ATTEMPTS'] = 3
+        self.app.config['ENRICHMENT_RETRY_DELAY'] = 10
+        self.app.config['ENRICHMENT_STALE_AFTER'] = 300
+        # Seconds each model may take per tweet before its fallback is used
+        self.app.config['ENRICHMENT_BUDGETS'] = {
+            'grammar': float(os.environ.get('ENRICHMENT_GRAMMAR_BUDGET', 5)),
+            'sentiment': float(os.environ.get('ENRICHMENT_SENTIMENT_BUDGET', 2)),
+            'hashtags': float(os.environ.get('ENRICHMENT_HASHTAGS_BUDGET', 5)),
+        }
+        # Also the number of jobs an enrichment worker claims and runs side by side, so
+        # their model calls fill a batch even with a single worker
+        self.app.config['INFERENCE_MAX_BATCH_SIZE'] = int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', 16))
+        self.app.config['INFERENCE_MAX_WAIT_MS'] = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 10))
+        # Queued inputs per model beyond which callers get InferenceOverloaded; 0 = unbounded
+        self.app.config['INFERENCE_MAX_QUEUE'] = int(os.environ.get('INFERENCE_MAX_QUEUE', 256))
+        # pytorch, pytorch-int8 or onnx; INFERENCE_BACKENDS overrides it per model,
+        # e.g. "sentiment=onnx,grammar=pytorch-int8"
+        self.app.config['INFERENCE_BACKEND'] = os.environ.get('INFERENCE_BACKEND', 'pytorch')
+        self.app.config['INFERENCE_BACKENDS'] = backends.parse_backends(os.environ.get('INFERENCE_BACKENDS'))
+        # Intra-/inter-op threads for torch and ONNX Runtime; 0 keeps their defaults
+        self.app.config['INFERENCE_THREADS'] = int(os.environ.get('INFERENCE_THREADS', 0))
+        self.app.config['INFERENCE_INTEROP_THREADS'] = int(os.environ.get('INFERENCE_INTEROP_THREADS', 0))
+        # Local model copies, as MODEL_DIR/<model id>; missing ones come from the hub
+        self.app.config['MODEL_DIR'] = os.environ.get('MODEL_DIR')
+        self.app.config['ONNX_EXPORT_DIR'] = os.path.join(self.app.instance_path, 'onnx')
+        # Address of `flask models serve` (unix:///path or tcp://host:port); unset runs models in-process
+        self.app.config['INFERENCE_SERVER'] = os.environ.get('INFERENCE_SERVER')
+        self.app.config['INFERENCE_SERVER_TIMEOUT'] = float(os.environ.get('INFERENCE_SERVER_TIMEOUT', 30))
+        self.app.config['INFERENCE_SERVER_POOL_SIZE'] = 8
+        self.app.config['INFERENCE_SERVER_RETRY_AFTER'] = 30
+        # Texts per request, so INFERENCE_SERVER_TIMEOUT covers bulk callers' batches too
+        self.app.config['INFERENCE_SERVER_BATCH_SIZE'] = int(os.environ.get('INFERENCE_SERVER_BATCH_SIZE', 32))
+        # Load the models in this process when the server fails; off, callers use the cheap fallbacks
+        self.app.config['INFERENCE_SERVER_LOCAL_FALLBACK'] = \
+            os.environ.get('INFERENCE_SERVER_LOCAL_FALLBACK', '').lower() in ('1', 'true', 'yes')
+        self.app.config['MODEL_CACHE_SIZE'] = 10000
+        self.app.config['MODEL_CACHE_PATH'] = os.path.join(self.app.instance_path, 'model_cache.db')
+        self.app.config['PRELOAD_MODELS'] = os.environ.get('PRELOAD_MODELS', '').lower() in ('1', 'true', 'yes')
+        # Total resident size of the loaded models; least recently used idle ones are unloaded past it
+        self.app.config['MODEL_MEMORY_BUDGET_MB'] = float(os.environ.get('MODEL_MEMORY_BUDGET_MB', 0))  # 0 = unbounded
+        # Preloaded models are shared with the forked workers; unloading them there frees nothing
+        self.app.config['MODEL_IDLE_UNLOAD_SECONDS'] = float(os.environ.get(
+            'MODEL_IDLE_UNLOAD_SECONDS', 0 if self.app.config['PRELOAD_MODELS'] else 1800))
+        self.app.config['LAST_SEEN_GRANULARITY'] = 60
+        self.app.config['LAST_SEEN_FLUSH_INTERVAL'] = 30
+        self.app.config['LAST_SEEN_FLUSH_THRESHOLD'] = 500
+        self.app.config['USER_CACHE_SIZE'] = 4096
+        self.app.config['USER_CACHE_TTL'] = 60
+        self.app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+        self.app.config['SERVER_TIMING'] = True
+        # Bearer token required to scrape /metrics; unset leaves it open
+        self.app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+        self.app.config['FRAGMENT_CACHE_SIZE'] = 5000
+        # e.g. redis://localhost:6379/0 to share rendered cards between processes
+        self.app.config['FRAGMENT_CACHE_URL'] = os.environ.get('FRAGMENT_CACHE_URL')
+        self.app.config['FRAGMENT_CACHE_TTL'] = 24 * 3600
+        self.app.config['TRENDING_WINDOWS'] = {'1h': 3600, '24h': 24 * 3600}
+        self.app.config['TRENDING_BUCKET_SECONDS'] = 300
+        self.app.config['TRENDING_TOP_K'] = 10
+        # Heaviest tags kept per bucket; window rankings are drawn from these
+        self.app.config['TRENDING_CANDIDATES'] = 100
+        self.app.config['TRENDING_SKETCH_WIDTH'] = 2048
+        self.app.config['TRENDING_SKETCH_DEPTH'] = 4
+        self.app.config['TRENDING_FLUSH_INTERVAL'] = 30
         self.app.permanent_session_lifetime = timedelta(minutes=30)
 
     def init_extensions(self):
         db.init_app(self.app)
+        database.init_app(self.app)
+        instrumentation.init_app(self.app)
         login_manager.init_app(self.app)
         login_manager.login_view = 'auth.login'
         Bootstrap(self.app)
         Migrate(self.app, db)
+        enrichment_worker.init_app(self.app)
+        inference.init_app(self.app)
+        model_manager.init_app(self.app)
+        batching.init_app(self.app)
+        model_cache.init_app(self.app)
+        activity_tracker.init_app(self.app)
+        identity.init_app(self.app)
+        fragments.init_app(self.app)
+        trending.init_app(self.app)
 
     def register_blueprints(self):
         from app.auth import auth_bp
         from app.main import main_bp
         from app.tweets import tweets_bp
+        from app.api import api_bp
 
         self.app.register_blueprint(auth_bp, url_prefix='/auth')
         self.app.register_blueprint(main_bp, url_prefix='/main')
         self.app.register_blueprint(tweets_bp, url_prefix='/tweets')
+        self.app.register_blueprint(api_bp, url_prefix='/api')
+
+    def register_commands(self):
+        from app.tweets.commands import models_cli
+
+        self.app.cli.add_command(models_cli)
+
+    def preload_models(self):
+        # Opt-in: load the models before serving, e.g. in a preforking
+        # server's master so workers share the weights copy-on-write.
+        inference.preload(self.app)
 
     def setup_callbacks(self):
-        from app.models import User
         from flask_login import current_user
         from flask import session, render_template
 
         @login_manager.user_loader
         def load_user(user_id):
-            return User.query.get(int(user_id))
+            return identity.identity_cache.load(int(user_id))
 
         @self.app.before_request
         def update_last_seen():
             if current_user.is_authenticated:
-                current_user.last_seen = datetime.utcnow()
-                db.session.commit()
+                activity_tracker.touch(current_user.id)
 
         @self.app.before_request
         def make_session_permanent():
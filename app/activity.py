@@ -0,0 +1,92 @@
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, update
+
+from app.extensions import db
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    """Write-behind buffer for ``User.last_seen``.
+
+    Requests only record activity in memory, at most once per user per
+    ``LAST_SEEN_GRANULARITY`` seconds.  Buffered timestamps are written in a
+    single executemany UPDATE every ``LAST_SEEN_FLUSH_INTERVAL`` seconds, as
+    soon as ``LAST_SEEN_FLUSH_THRESHOLD`` users are waiting, and at exit.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._recorded = {}
+        self._pid = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['activity_tracker'] = self
+        # Once per process, however many apps are created
+        atexit.unregister(self.flush)
+        atexit.register(self.flush)
+
+    def touch(self, user_id, now=None):
+        now = now or datetime.utcnow()
+        granularity = timedelta(seconds=self.app.config['LAST_SEEN_GRANULARITY'])
+        with self._lock:
+            last = self._recorded.get(user_id)
+            if last is not None and now - last < granularity:
+                return
+            self._recorded[user_id] = now
+            self._pending[user_id] = now
+            due = len(self._pending) >= self.app.config['LAST_SEEN_FLUSH_THRESHOLD']
+        self._ensure_timer()
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            # Users not seen within the granularity window may be recorded again
+            horizon = datetime.utcnow() - timedelta(seconds=self.app.config['LAST_SEEN_GRANULARITY'])
+            self._recorded = {uid: seen for uid, seen in self._recorded.items() if seen > horizon}
+        if not pending:
+            return 0
+        statement = update(User.__table__) \
+            .where(User.__table__.c.id == bindparam('user_id')) \
+            .values(last_seen=bindparam('seen'))
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                connection.execute(statement, [
+                    {'user_id': user_id, 'seen': seen} for user_id, seen in pending.items()
+                ])
+        except Exception:
+            logger.exception('Could not flush last_seen for %d users', len(pending))
+            with self._lock:
+                for user_id, seen in pending.items():
+                    self._pending.setdefault(user_id, seen)
+            return 0
+        return len(pending)
+
+    def _ensure_timer(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run_timer, name='activity-flush', daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run_timer(self):
+        while not self._stop.wait(self.app.config['LAST_SEEN_FLUSH_INTERVAL']):
+            self.flush()
+
+
+activity_tracker = ActivityTracker()
@@ -0,0 +1,88 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import request, jsonify, current_app
+
+from app.api import api_bp
+from app.extensions import db
+from app.hashtags import parse_hashtags
+from app.timeline import timeline_page
+from app.tweets.images import image_url
+from app.watermark import read_watermark
+
+
+def tweet_to_dict(tweet):
+    return {
+        'id': tweet.id,
+        'author': tweet.author.username,
+        'content': tweet.content,
+        'image': image_url(tweet.image) if tweet.image else None,
+        'sentiment': tweet.sentiment,
+        'hashtags': parse_hashtags(tweet.hashtags),
+        'like_count': tweet.like_count,
+        'comment_count': tweet.comment_count,
+        'enrichment_status': tweet.enrichment_status,
+        'created_at': tweet.created_at.isoformat(),
+    }
+
+
+def timeline_etag(version, args):
+    # The same data version and query string always produce the same body
+    query = '&'.join(f'{k}={v}' for k, v in sorted(args.items(multi=True)))
+    return hashlib.sha1(f'{version}?{query}'.encode()).hexdigest()
+
+
+def timeline_last_modified(updated_at):
+    """The watermark time as a Last-Modified value, once its second is over.
+
+    HTTP dates are whole seconds, so until then another write could land
+    in the same second without changing the header, and a client
+    revalidating with If-Modified-Since would get a wrong 304.  Such
+    responses carry only the ETag.
+    """
+    if updated_at is None or updated_at >= datetime.utcnow().replace(microsecond=0):
+        return None
+    return updated_at.replace(tzinfo=timezone.utc)
+
+
+def is_not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    return bool(last_modified and request.if_modified_since and request.if_modified_since >= last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Clients may keep the body but must revalidate before reusing it
+    response.cache_control.no_cache = True
+    return response
+
+
+@api_bp.route('/timeline')
+def timeline():
+    """The ``main.home`` timeline as JSON, with conditional GET support.
+
+    The validators come from the timeline watermark alone, so a poll that
+    finds nothing new costs one primary-key lookup and returns 304.
+    """
+    version, updated_at = read_watermark(db.session)
+    etag = timeline_etag(version, request.args)
+    last_modified = timeline_last_modified(updated_at)
+    if is_not_modified(etag, last_modified):
+        return set_validators(current_app.response_class(status=304), etag, last_modified)
+
+    page, filter_args, can_rank = timeline_page(request.args)
+    if page.invalid_cursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    response = jsonify({
+        'items': [tweet_to_dict(tweet) for tweet in page.items],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        'sort_by': filter_args['sort_by'],
+        'order': filter_args['order'],
+        'per_page': filter_args['per_page'],
+        'can_rank': can_rank,
+    })
+    return set_validators(response, etag, last_modified)
@@ -0,0 +1,65 @@
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.cache import LRUCache
+from app.extensions import db
+from app.models import User
+
+
+class IdentityCache:
+    """Short-lived per-process cache behind Flask-Login's ``user_loader``.
+
+    Holds detached snapshots of ``User`` rows; a hit is merged into the
+    request's session with ``load=False``, which builds ``current_user``
+    without a round trip.  Entries expire after ``ttl`` seconds and are
+    dropped as soon as a User row is updated or deleted through the ORM.
+    """
+
+    def __init__(self, maxsize=4096, ttl=60):
+        self.configure(maxsize, ttl)
+
+    def configure(self, maxsize, ttl):
+        self.ttl = ttl
+        self._cache = LRUCache(maxsize)
+
+    def load(self, user_id):
+        entry = self._cache.get(user_id)
+        if entry is not None:
+            snapshot, expires_at = entry
+            if expires_at > time.monotonic():
+                return db.session.merge(snapshot, load=False)
+            self._cache.delete(user_id)
+
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self._cache.set(user_id, (self._snapshot(user), time.monotonic() + self.ttl))
+        return user
+
+    @staticmethod
+    def _snapshot(user):
+        snapshot = User(**{
+            attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs
+        })
+        make_transient_to_detached(snapshot)
+        return snapshot
+
+    def invalidate(self, user_id):
+        self._cache.delete(user_id)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+identity_cache = IdentityCache()
+
+
+def init_app(app):
+    identity_cache.configure(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    identity_cache.invalidate(target.id)
@@ -0,0 +1,69 @@
+import os
+
+from sqlalchemy import event, insert
+from sqlalchemy.dialects import sqlite
+
+from app.extensions import db
+
+
+def env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options(uri):
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for ``uri``, tunable through the environment."""
+    if uri.startswith('sqlite'):
+        return {
+            # sqlite3 waits this long for a lock before raising "database is locked"
+            'connect_args': {'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000},
+        }
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        # MySQL closes idle connections after wait_timeout (8h by default);
+        # recycle well before that and ping before handing one out.
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 280)),
+        'pool_pre_ping': env_flag('DB_POOL_PRE_PING', True),
+    }
+
+
+def sqlite_pragmas(config):
+    return {
+        'journal_mode': config['SQLITE_JOURNAL_MODE'],
+        'synchronous': config['SQLITE_SYNCHRONOUS'],
+        'busy_timeout': config['SQLITE_BUSY_TIMEOUT_MS'],
+        # A negative cache_size is in KiB rather than pages
+        'cache_size': -config['SQLITE_CACHE_SIZE_KB'],
+        'mmap_size': config['SQLITE_MMAP_SIZE'],
+        'temp_store': 'MEMORY',
+    }
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def insert_ignore(model):
+    # INSERT that silently skips rows violating a unique constraint
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(model).on_conflict_do_nothing()
+    if dialect in ('mysql', 'mariadb'):
+        return insert(model).prefix_with('IGNORE')
+    return insert(model)
+
+
+def init_app(app):
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite':
+        apply_sqlite_pragmas(engine, sqlite_pragmas(app.config))
@@ -0,0 +1,146 @@
+import hashlib
+import logging
+
+from flask import render_template
+from markupsafe import Markup
+
+from app.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Partials rendered through the cache; invalidating a tweet drops all of them
+CARD_TEMPLATES = ('_tweet_card.html', '_profile_tweet_card.html')
+
+
+def tweet_version(tweet):
+    """Fingerprint of every field a tweet card shows."""
+    fields = (
+        tweet.content, tweet.image, tweet.sentiment, tweet.hashtags, tweet.enrichment_status,
+        tweet.like_count, tweet.comment_count, tweet.author.username,
+    )
+    return hashlib.blake2b(repr(fields).encode(), digest_size=8).hexdigest()
+
+
+# ——— BACKENDS ——————————————————————————————————————————————————————————————
+class MemoryBackend:
+    """Per-process LRU; the default."""
+
+    def __init__(self, maxsize):
+        self._cache = LRUCache(maxsize)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def delete(self, *keys):
+        for key in keys:
+            self._cache.delete(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return dict(self._cache.stats(), backend='memory')
+
+
+class RedisBackend:
+    """Shared by every process pointed at the same Redis; needs the ``redis`` package."""
+
+    def __init__(self, url, ttl, prefix='fragment:'):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._errors = redis.RedisError
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self._client.get(self.prefix + key)
+        except self._errors:
+            logger.exception('Fragment cache read failed')
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value.decode()
+
+    def set(self, key, value):
+        try:
+            self._client.set(self.prefix + key, value, ex=self.ttl)
+        except self._errors:
+            logger.exception('Fragment cache write failed')
+
+    def delete(self, *keys):
+        try:
+            self._client.delete(*(self.prefix + key for key in keys))
+        except self._errors:
+            logger.exception('Fragment cache invalidation failed')
+
+    def clear(self):
+        for key in self._client.scan_iter(f'{self.prefix}*'):
+            self._client.delete(key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': 'redis',
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# ——— CACHE ————————————————————————————————————————————————————————————————
+class FragmentCache:
+    """Cache of rendered tweet cards, keyed by template + tweet ID.
+
+    Each entry carries the ``tweet_version`` it was rendered from, and a
+    lookup whose version differs counts as a miss, so a card is never
+    served stale even when another process changed the tweet.  The write
+    paths also call ``invalidate`` so that outdated cards do not linger.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend(1024)
+
+    def configure(self, backend):
+        self.backend = backend
+
+    def render(self, template, tweet):
+        key = f'{template}:{tweet.id}'
+        version = tweet_version(tweet)
+        entry = self.backend.get(key)
+        if entry is not None:
+            cached_version, _, html = entry.partition('\n')
+            if cached_version == version:
+                return Markup(html)
+        html = render_template(template, tweet=tweet)
+        self.backend.set(key, f'{version}\n{html}')
+        return Markup(html)
+
+    def invalidate(self, tweet_id):
+        self.backend.delete(*(f'{template}:{tweet_id}' for template in CARD_TEMPLATES))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        return self.backend.stats()
+
+
+fragment_cache = FragmentCache()
+
+
+def init_app(app):
+    if app.config['FRAGMENT_CACHE_URL']:
+        backend = RedisBackend(app.config['FRAGMENT_CACHE_URL'], app.config['FRAGMENT_CACHE_TTL'])
+    else:
+        backend = MemoryBackend(app.config['FRAGMENT_CACHE_SIZE'])
+    fragment_cache.configure(backend)
+    app.add_template_global(fragment_cache.render, 'cached_card')
@@ -0,0 +1,65 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.database import insert_ignore
+from app.extensions import db
+from app.models import Tweet, Hashtag, TweetHashtag
+
+MAX_TAG_LENGTH = 50
+
+
+def normalize_tag(tag):
+    return tag.strip().lstrip('#').lower()
+
+
+def parse_hashtags(text):
+    """Split a space-joined ``Tweet.hashtags`` string into unique normalized tags."""
+    tags = []
+    for tag in (text or '').split():
+        tag = normalize_tag(tag)
+        if tag and len(tag) <= MAX_TAG_LENGTH and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def get_or_create_hashtags(tags):
+    existing = {h.tag: h for h in Hashtag.query.filter(Hashtag.tag.in_(tags))} if tags else {}
+    hashtags = []
+    for tag in tags:
+        hashtag = existing.get(tag)
+        if hashtag is None:
+            hashtag = Hashtag(tag=tag)
+            try:
+                # A concurrent request may insert the same tag first
+                with db.session.begin_nested():
+                    db.session.add(hashtag)
+            except IntegrityError:
+                hashtag = Hashtag.query.filter_by(tag=tag).one()
+        hashtags.append(hashtag)
+    return hashtags
+
+
+def get_or_create_hashtag_ids(tags):
+    """Map each of ``tags`` to its ``Hashtag.id`` using two statements, whatever the count."""
+    if not tags:
+        return {}
+    db.session.execute(insert_ignore(Hashtag), [{'tag': tag} for tag in tags])
+    return dict(db.session.execute(select(Hashtag.tag, Hashtag.id).where(Hashtag.tag.in_(tags))).all())
+
+
+def set_tweet_hashtags(tweet, hashtags_list):
+    """Store ``hashtags_list`` on ``tweet`` both as display text and as indexed links."""
+    tags = parse_hashtags(' '.join(hashtags_list))
+    tweet.hashtags = ' '.join(f'#{tag}' for tag in tags)
+    current = {link.hashtag_id: link for link in tweet.hashtag_links}
+    tweet.hashtag_links = [
+        current.get(hashtag.id) or TweetHashtag(hashtag=hashtag)
+        for hashtag in get_or_create_hashtags(tags)
+    ]
+
+
+def filter_by_hashtag(query, tag):
+    return query \
+        .join(TweetHashtag, TweetHashtag.tweet_id == Tweet.id) \
+        .join(Hashtag, Hashtag.id == TweetHashtag.hashtag_id) \
+        .filter(Hashtag.tag == normalize_tag(tag))
@@ -0,0 +1,255 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import g, has_app_context, request, current_app, abort, template_rendered, before_render_template
+from sqlalchemy import event
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# SLOW_QUERY_THRESHOLD_MS of the app; None disables the slow-query log
+_slow_query_threshold = None
+
+
+# ——— METRICS ——————————————————————————————————————————————————————————————
+class Histogram:
+    """Prometheus-style histogram: cumulative buckets, sum and count per label set."""
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            labels = [_label(label, value) for label, value in zip(self.labels, key)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_braces(labels + [_label("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_bucket{_braces(labels + [_label("le", "+Inf")])} {count}')
+            lines.append(f'{self.name}_sum{_braces(labels)} {total}')
+            lines.append(f'{self.name}_count{_braces(labels)} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            labels = [_label(label, value) for label, value in zip(self.labels, key)]
+            lines.append(f'{self.name}{_braces(labels)} {value}')
+        return lines
+
+
+def _label(name, value):
+    return f'{name}="{value}"'
+
+
+def _braces(labels):
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time spent handling a request.',
+                            ('endpoint', 'method', 'status'))
+REQUEST_QUERIES = Histogram('http_request_sql_queries', 'SQL statements executed per request.',
+                            ('endpoint',), COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = Histogram('http_request_sql_seconds', 'Time spent in SQL per request.', ('endpoint',))
+TEMPLATE_SECONDS = Histogram('template_render_seconds', 'Time spent rendering templates per request.',
+                             ('endpoint',))
+SQL_SECONDS = Histogram('sql_query_duration_seconds', 'Duration of single SQL statements.')
+INFERENCE_SECONDS = Histogram('inference_seconds', 'Time callers wait for a model, batching included.',
+                              ('model',))
+SLOW_QUERIES = Counter('sql_slow_queries_total', 'Statements slower than SLOW_QUERY_THRESHOLD_MS.')
+MODEL_EVENTS = Counter('model_events_total', 'Model loads and unloads (by budget, idleness or request).',
+                       ('model', 'event'))
+MODEL_LOAD_SECONDS = Histogram('model_load_seconds', 'Time spent loading a model.', ('model',),
+                               (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+
+METRICS = (REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_SQL_SECONDS, TEMPLATE_SECONDS, SQL_SECONDS,
+           INFERENCE_SECONDS, SLOW_QUERIES, MODEL_EVENTS, MODEL_LOAD_SECONDS)
+
+
+# ——— SPANS ————————————————————————————————————————————————————————————————
+def _timings():
+    # Per-request accumulators; None outside a request (worker threads, CLI)
+    if not has_app_context():
+        return None
+    return g.get('_timings')
+
+
+@contextmanager
+def inference_span(model):
+    """Time a model call; usable as a ``with`` block or a decorator."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        INFERENCE_SECONDS.observe(elapsed, model=model)
+        timings = _timings()
+        if timings is not None:
+            timings[f'inf-{model}'] += elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    SQL_SECONDS.observe(elapsed)
+    timings = _timings()
+    if timings is not None:
+        timings['db'] += elapsed
+        timings['db-count'] += 1
+    threshold = _slow_query_threshold
+    if threshold is not None and elapsed * 1000 >= threshold:
+        SLOW_QUERIES.inc()
+        logger.warning('Slow query (%.1f ms): %s', elapsed * 1000, ' '.join(statement.split()))
+
+
+def _before_render(sender, template, context, **extra):
+    stack = g.setdefault('_render_started', [])
+    stack.append(time.perf_counter())
+
+
+def _rendered(sender, template, context, **extra):
+    stack = g.get('_render_started')
+    if not stack:
+        return
+    started = stack.pop()
+    timings = _timings()
+    # Partials rendered inside a page are already part of the page's time
+    if not stack and timings is not None:
+        timings['tpl'] += time.perf_counter() - started
+
+
+# ——— REQUEST HOOKS ————————————————————————————————————————————————————————
+def _start_request():
+    g._timings = defaultdict(float)
+    g._request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    timings = g.pop('_timings', None)
+    if timings is None:
+        return response
+    total = time.perf_counter() - g.pop('_request_started')
+    endpoint = request.endpoint or 'unmatched'
+
+    REQUEST_SECONDS.observe(total, endpoint=endpoint, method=request.method, status=str(response.status_code))
+    REQUEST_QUERIES.observe(timings['db-count'], endpoint=endpoint)
+    REQUEST_SQL_SECONDS.observe(timings['db'], endpoint=endpoint)
+    TEMPLATE_SECONDS.observe(timings['tpl'], endpoint=endpoint)
+
+    if current_app.config['SERVER_TIMING']:
+        entries = [f'db;dur={timings["db"] * 1000:.1f};desc="{int(timings["db-count"])} queries"',
+                   f'tpl;dur={timings["tpl"] * 1000:.1f}']
+        entries += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in timings.items()
+                    if name.startswith('inf-')]
+        entries.append(f'total;dur={total * 1000:.1f}')
+        response.headers.add('Server-Timing', ', '.join(entries))
+    return response
+
+
+# ——— EXPOSITION ———————————————————————————————————————————————————————————
+def _gauges(name, help_text, stats_by_label, label):
+    """Numeric fields of ``{label_value: stats_dict}`` as one gauge family per field."""
+    lines = []
+    fields = sorted({k for stats in stats_by_label.values() for k, v in stats.items()
+                     if isinstance(v, (int, float))})
+    for field in fields:
+        metric = f'{name}_{field}'
+        lines += [f'# HELP {metric} {help_text} ({field}).', f'# TYPE {metric} gauge']
+        for value, stats in sorted(stats_by_label.items()):
+            if isinstance(stats.get(field), (int, float)):
+                lines.append(f'{metric}{_braces([_label(label, value)])} {float(stats[field])}')
+    return lines
+
+
+def render_metrics():
+    from app.auth.identity import identity_cache
+    from app.fragments import fragment_cache
+    from app.tweets.batching import batching_stats
+    from app.tweets.inference import server_client_stats
+    from app.tweets.model_cache import model_cache
+    from app.tweets.model_manager import model_manager
+
+    lines = []
+    for metric in METRICS:
+        lines += metric.exposition()
+    lines += _gauges('inference_batcher', 'Micro-batcher statistics', batching_stats(), 'model')
+    lines += _gauges('cache', 'In-process cache statistics', {
+        'model_output': model_cache.stats(),
+        'identity': identity_cache.stats(),
+        'fragment': fragment_cache.stats(),
+    }, 'cache')
+    lines += _gauges('model', 'Loaded model statistics', model_manager.stats(), 'model')
+    lines += ['# HELP model_memory_budget_bytes MODEL_MEMORY_BUDGET_MB in bytes; 0 is unbounded.',
+              '# TYPE model_memory_budget_bytes gauge',
+              f'model_memory_budget_bytes {float(model_manager.budget_bytes)}']
+    lines += _gauges('inference_server_client', 'Inference server client statistics', server_client_stats(), 'server')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(403)
+    return render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+def init_app(app):
+    global _slow_query_threshold
+    _slow_query_threshold = app.config['SLOW_QUERY_THRESHOLD_MS']
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,23 @@
+from sqlalchemy.orm import joinedload
+
+from app.models import Tweet, Comment
+
+
+# Tweet cards only ever need the author row and the denormalized counters,
+# so lists are built with the author joined in and never touch the
+# Like/Comment collections.
+
+def with_authors(query):
+    return query.options(joinedload(Tweet.author, innerjoin=True))
+
+
+def get_tweet_or_404(tweet_id):
+    return with_authors(Tweet.query).filter(Tweet.id == tweet_id).first_or_404()
+
+
+def get_comments(tweet):
+    return Comment.query \
+        .options(joinedload(Comment.user, innerjoin=True)) \
+        .filter(Comment.tweet_id == tweet.id) \
+        .order_by(Comment.created_at, Comment.id) \
+        .all()
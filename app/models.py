@@ -6,16 +6,28 @@ from app.extensions import db
 
 
 class Tweet(db.Model):
+    __table_args__ = (
+        db.Index('ix_tweet_user_id_created_at', 'user_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.String(280), nullable=False)
     image = db.Column(db.String(100), nullable=True)
     sentiment = db.Column(db.String(10), nullable=True)
     hashtags = db.Column(db.String(150), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    like_count = db.Column(db.Integer, default=0, server_default='0', nullable=False, index=True)
+    comment_count = db.Column(db.Integer, default=0, server_default='0', nullable=False, index=True)
+    enrichment_status = db.Column(db.String(10), default='done', server_default='done', nullable=False)
+    # 'models', or 'fallback:<stages>' when a model was over budget
+    enrichment_path = db.Column(db.String(40), nullable=True)
 
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     likes = db.relationship('Like', backref='tweet', lazy=True, cascade='all, delete-orphan')
     comments = db.relationship('Comment', backref='tweet', lazy=True, cascade='all, delete-orphan')
+    hashtag_links = db.relationship('TweetHashtag', backref='tweet', lazy=True, cascade='all, delete-orphan')
+    enrichment_job = db.relationship('EnrichmentJob', backref='tweet', uselist=False, lazy=True,
+                                     cascade='all, delete-orphan')
 
 
 class User(UserMixin, db.Model):
@@ -23,6 +35,7 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(50), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
+    last_seen = db.Column(db.DateTime, nullable=True)
     tweets = db.relationship('Tweet', backref='author', lazy=True)
 
     def set_password(self, password):
@@ -33,6 +46,10 @@ class User(UserMixin, db.Model):
 
 
 class Comment(db.Model):
+    __table_args__ = (
+        db.Index('ix_comment_tweet_id_created_at', 'tweet_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.String(280), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -43,7 +60,56 @@ class Comment(db.Model):
 
 
 class Like(db.Model):
+    __table_args__ = (
+        db.Index('uq_like_user_id_tweet_id', 'user_id', 'tweet_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     tweet_id = db.Column(db.Integer, db.ForeignKey('tweet.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Hashtag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    tag = db.Column(db.String(50), unique=True, nullable=False)
+
+
+class TweetHashtag(db.Model):
+    __table_args__ = (
+        db.Index('ix_tweet_hashtag_hashtag_id_tweet_id', 'hashtag_id', 'tweet_id'),
+    )
+
+    tweet_id = db.Column(db.Integer, db.ForeignKey('tweet.id'), primary_key=True)
+    hashtag_id = db.Column(db.Integer, db.ForeignKey('hashtag.id'), primary_key=True)
+
+    hashtag = db.relationship('Hashtag', lazy='joined')
+
+
+class EnrichmentJob(db.Model):
+    __table_args__ = (
+        db.Index('ix_enrichment_job_status_run_after', 'status', 'run_after'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tweet_id = db.Column(db.Integer, db.ForeignKey('tweet.id'), unique=True, nullable=False)
+    status = db.Column(db.String(10), default='queued', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.String(255), nullable=True)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Watermark(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TrendingBucket(db.Model):
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    sketch = db.Column(db.LargeBinary, nullable=False)
+    # {tag: estimated count} of the bucket's heaviest tags, as JSON
+    candidates = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,116 @@
+import base64
+import json
+import math
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+# Cursor keys and ids are bound as 64-bit integers
+MIN_INT64, MAX_INT64 = -2 ** 63, 2 ** 63 - 1
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query plus the cursors around it."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, invalid_cursor=False):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        # A cursor was given but could not be decoded, so this is the first page
+        self.invalid_cursor = invalid_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(key, row_id):
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    payload = json.dumps([key, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def _is_int64(value):
+    return isinstance(value, int) and not isinstance(value, bool) and MIN_INT64 <= value <= MAX_INT64
+
+
+def decode_cursor(cursor, key_is_datetime=False):
+    """Return ``(key, id)`` from a cursor string, or ``None`` if it is malformed.
+
+    Cursors come from the client, so anything but a datetime string (date
+    sort) or a finite number (count and relevance sorts) with a 64-bit
+    integer id is rejected rather than passed to the query.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if key_is_datetime:
+            key = datetime.fromisoformat(key)
+    except (ValueError, TypeError):
+        return None
+    if not _is_int64(row_id):
+        return None
+    if not key_is_datetime and not (
+        _is_int64(key) or isinstance(key, float) and math.isfinite(key)
+    ):
+        return None
+    return key, row_id
+
+
+def get_page_size(value, default, maximum):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def keyset_paginate(query, key_column, id_column, order='desc', cursor=None,
+                    direction='next', per_page=20, key_is_datetime=False):
+    """Paginate ``query`` by ``(key_column, id_column)`` without OFFSET.
+
+    ``query`` must select the entity first and ``key_column`` second, so each
+    row is ``(item, key)``.  Only ``per_page + 1`` rows are fetched per request,
+    so the cost of a page does not grow with the size of the table.
+    """
+    descending = order == 'desc'
+    position = decode_cursor(cursor, key_is_datetime)
+    backwards = position is not None and direction == 'prev'
+
+    if position is not None:
+        key, row_id = position
+        # Walking forward in a descending list means smaller keys, and vice versa.
+        if descending != backwards:
+            condition = or_(key_column < key, and_(key_column == key, id_column < row_id))
+        else:
+            condition = or_(key_column > key, and_(key_column == key, id_column > row_id))
+        query = query.filter(condition)
+
+    if descending != backwards:
+        query = query.order_by(key_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(key_column.asc(), id_column.asc())
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    next_cursor = prev_cursor = None
+    if rows:
+        first_item, first_key = rows[0]
+        last_item, last_key = rows[-1]
+        if has_more or backwards:
+            next_cursor = encode_cursor(last_key, last_item.id)
+        if (has_more and backwards) or (position is not None and not backwards):
+            prev_cursor = encode_cursor(first_key, first_item.id)
+
+    return KeysetPage(items, next_cursor=next_cursor, prev_cursor=prev_cursor,
+                      invalid_cursor=cursor is not None and position is None)
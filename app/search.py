@@ -0,0 +1,88 @@
+from sqlalchemy import DDL, event, func, inspect, literal_column, table, column
+from sqlalchemy.dialects import mysql
+
+from app.extensions import db
+from app.models import Tweet
+
+
+# ——— INDEX DDL ———————————————————————————————————————————————————————————————
+# SQLite: an external-content FTS5 table over tweet.content, kept in sync by
+# triggers so every write path (ORM, bulk inserts, raw SQL) is covered.
+# MySQL: a FULLTEXT index on the column itself.
+FTS_TABLE = 'tweet_fts'
+FULLTEXT_INDEX = 'ix_tweet_content_fulltext'
+
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"content, content='tweet', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tweet BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tweet BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON tweet BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); "
+    f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END",
+]
+
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+MYSQL_CREATE = f"ALTER TABLE tweet ADD FULLTEXT INDEX {FULLTEXT_INDEX} (content)"
+MYSQL_DROP = f"ALTER TABLE tweet DROP INDEX {FULLTEXT_INDEX}"
+
+# Keep db.create_all()/drop_all() in step with the migrations.
+for statement in SQLITE_CREATE:
+    event.listen(Tweet.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in SQLITE_DROP:
+    event.listen(Tweet.__table__, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Tweet.__table__, 'after_create', DDL(MYSQL_CREATE).execute_if(dialect='mysql'))
+
+fts = table(FTS_TABLE, column('rowid'))
+
+
+# ——— QUERIES ————————————————————————————————————————————————————————————————
+def fts5_query(text):
+    # Quote every token so user input can never be parsed as FTS5 syntax,
+    # and prefix-match it to keep the "search as you type" feel of LIKE.
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def full_text_search(query, text):
+    """Restrict ``query`` to tweets matching ``text``.
+
+    Returns ``(query, relevance)`` where ``relevance`` is a column expression
+    that grows with how well a tweet matches, or ``None`` when the database
+    has no full-text index and the query falls back to a LIKE scan.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        match = literal_column(FTS_TABLE).op('MATCH')(fts5_query(text))
+        # bm25() is lower for better matches; negate it so "desc" means best first.
+        relevance = -func.bm25(literal_column(FTS_TABLE))
+        return query.join(fts, fts.c.rowid == Tweet.id).filter(match), relevance
+    if dialect in ('mysql', 'mariadb'):
+        relevance = mysql.match(Tweet.content, against=text).in_natural_language_mode()
+        return query.filter(relevance > 0), relevance
+    return query.filter(Tweet.content.ilike(f'%{text}%')), None
+
+
+def rebuild_index():
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as connection:
+        if dialect == 'sqlite':
+            for statement in SQLITE_CREATE:
+                connection.exec_driver_sql(statement)
+            connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif dialect in ('mysql', 'mariadb'):
+            indexes = {index['name'] for index in inspect(connection).get_indexes('tweet')}
+            if FULLTEXT_INDEX in indexes:
+                connection.exec_driver_sql(MYSQL_DROP)
+            connection.exec_driver_sql(MYSQL_CREATE)
+        else:
+            return False
+    return True
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.models import User, Tweet
+from app.pagination import keyset_paginate, get_page_size
+from app.loading import with_authors
+from app.search import full_text_search
+from app.hashtags import filter_by_hashtag
+
+
+def page_args(args):
+    per_page = get_page_size(
+        args.get('per_page'),
+        current_app.config['TWEETS_PER_PAGE'],
+        current_app.config['MAX_TWEETS_PER_PAGE']
+    )
+    cursor = args.get('cursor', '').strip() or None
+    direction = 'prev' if args.get('direction') == 'prev' else 'next'
+    return cursor, direction, per_page
+
+
+def timeline_page(args):
+    """Filter, sort and keyset-paginate tweets by the timeline query string.
+
+    Shared by the HTML timeline and the JSON API.  Returns the page, the
+    normalized filter arguments (for building links) and whether relevance
+    ranking is available for the search.
+    """
+    query = args.get('q', '').strip()
+    date_str = args.get('date', '').strip()
+    min_likes = args.get('min_likes', '').strip()
+    min_comments = args.get('min_comments', '').strip()
+
+    # New: sort options
+    sort_by = args.get('sort_by', '')
+    order = args.get('order', 'desc')
+
+    tweets_query = with_authors(Tweet.query)
+    relevance = None
+
+    # Поиск
+    if query:
+        if query.startswith('@'):
+            username = query[1:]
+            user = User.query.filter_by(username=username).first()
+            if user:
+                tweets_query = tweets_query.filter(Tweet.user_id == user.id)
+            else:
+                tweets_query = tweets_query.filter(False)
+        elif query.startswith('#'):
+            tweets_query = filter_by_hashtag(tweets_query, query)
+        else:
+            tweets_query, relevance = full_text_search(tweets_query, query)
+
+    # Фильтр по дате
+    if date_str:
+        try:
+            date = datetime.strptime(date_str, '%Y-%m-%d')
+            next_day = date + timedelta(days=1)
+            tweets_query = tweets_query.filter(
+                Tweet.created_at >= date,
+                Tweet.created_at < next_day
+            )
+        except ValueError:
+            pass
+
+    # Лайки и комментарии — по счётчикам
+    if min_likes.isdigit():
+        tweets_query = tweets_query.filter(Tweet.like_count >= int(min_likes))
+
+    if min_comments.isdigit():
+        tweets_query = tweets_query.filter(Tweet.comment_count >= int(min_comments))
+
+    # --- Сортировка и пагинация по курсору ---
+    order = 'asc' if order == 'asc' else 'desc'
+    cursor, direction, per_page = page_args(args)
+
+    if relevance is not None and sort_by in ('', 'relevance'):
+        sort_by = 'relevance'
+        sort_key = relevance
+    elif sort_by == 'likes':
+        sort_key = Tweet.like_count
+    elif sort_by == 'comments':
+        sort_key = Tweet.comment_count
+    else:  # default or 'date'
+        sort_by = 'date'
+        sort_key = Tweet.created_at
+
+    page = keyset_paginate(
+        tweets_query.add_columns(sort_key),
+        sort_key, Tweet.id,
+        order=order,
+        cursor=cursor,
+        direction=direction,
+        per_page=per_page,
+        key_is_datetime=sort_by == 'date'
+    )
+
+    filter_args = {
+        'q': query,
+        'date': date_str,
+        'min_likes': min_likes,
+        'min_comments': min_comments,
+        'sort_by': sort_by,
+        'order': order,
+        'per_page': per_page,
+    }
+    return page, filter_args, relevance is not None
@@ -0,0 +1,323 @@
+import atexit
+import hashlib
+import heapq
+import json
+import logging
+import os
+import sys
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, delete
+
+from app.extensions import db
+from app.models import TrendingBucket
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+# ——— SKETCHES —————————————————————————————————————————————————————————————
+def sketch_cells(item, width, depth):
+    """Counter positions of ``item``; the same for every sketch of equal dimensions."""
+    digest = hashlib.blake2b(item.encode(), digest_size=4 * depth).digest()
+    return [row * width + int.from_bytes(digest[4 * row:4 * row + 4], 'little') % width for row in range(depth)]
+
+
+class CountMinSketch:
+    """Approximate counter in fixed memory; estimates never undercount."""
+
+    def __init__(self, width=1024, depth=4, counts=None):
+        self.width = width
+        self.depth = depth
+        self.counts = counts if counts is not None else array('I', bytes(4 * width * depth))
+
+    def cells(self, item):
+        return sketch_cells(item, self.width, self.depth)
+
+    def add(self, item, count=1):
+        """Count ``item`` and return its new estimate."""
+        cells = self.cells(item)
+        for cell in cells:
+            self.counts[cell] += count
+        return self.estimate(item, cells)
+
+    def estimate(self, item, cells=None):
+        return min(self.counts[cell] for cell in cells or self.cells(item))
+
+    def to_bytes(self):
+        counts = array('I', self.counts)
+        if sys.byteorder == 'big':
+            counts.byteswap()
+        return counts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, width, depth):
+        counts = array('I')
+        counts.frombytes(data)
+        if sys.byteorder == 'big':
+            counts.byteswap()
+        if len(counts) != width * depth:  # the dimensions were reconfigured
+            return cls(width, depth)
+        return cls(width, depth, counts)
+
+
+class TopK:
+    """The ``k`` items with the highest estimates seen so far (a min-heap with lazy deletes)."""
+
+    def __init__(self, k, items=None):
+        self.k = k
+        self.items = {}
+        self._heap = []
+        for item, estimate in (items or {}).items():
+            self.update(item, estimate)
+
+    def update(self, item, estimate):
+        if item not in self.items and len(self.items) >= self.k:
+            if estimate <= self._min():
+                return
+            del self.items[heapq.heappop(self._heap)[1]]
+        self.items[item] = estimate
+        heapq.heappush(self._heap, (estimate, item))
+        if len(self._heap) > 4 * self.k:  # drop the stale entries now and then
+            self._heap = [(v, i) for i, v in self.items.items()]
+            heapq.heapify(self._heap)
+
+    def _min(self):
+        # Skip heap entries superseded by a later update of the same item
+        while self._heap[0][0] != self.items.get(self._heap[0][1]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0]
+
+
+class Bucket:
+    """Counts for one time slice: a sketch plus the slice's heaviest tags."""
+
+    def __init__(self, sketch, candidates):
+        self.sketch = sketch
+        self.candidates = candidates
+
+
+class WindowRanking:
+    """Window scores of every bucket candidate, valid while ``horizon`` stays the same."""
+
+    def __init__(self, horizon, scores):
+        self.horizon = horizon
+        self.scores = scores
+        self.ranking = None
+
+
+# ——— TRACKER ——————————————————————————————————————————————————————————————
+class TrendingTracker:
+    """Trending hashtags over sliding windows (by default the last hour and day).
+
+    Time is cut into ``TRENDING_BUCKET_SECONDS`` buckets, each holding a
+    Count-Min sketch and a top-K of its heaviest tags.  A window's score for
+    a tag is the sum of its bucket estimates.  Each window keeps the scores
+    of the buckets' candidates up to date as tags are recorded and rebuilds
+    them only when a bucket slides out, so ``top()`` costs the same however
+    many tweets were counted.
+
+    Recorded tags are applied in memory at once and written to the
+    ``trending_bucket`` table every ``TRENDING_FLUSH_INTERVAL`` seconds
+    (merged into the stored sketches, as every process flushes its own
+    counts).  The same timer reloads buckets changed by other processes,
+    so restarts and multi-process deployments see the same trends.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.RLock()
+        self._buckets = {}
+        self._versions = {}
+        self._pending = {}
+        self._windows = {}
+        self._loaded = False
+        self._pid = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['trending'] = self
+        # Once per process, however many apps are created
+        atexit.unregister(self.flush)
+        atexit.register(self.flush)
+
+    # — configuration helpers —
+    def _config(self, key):
+        return self.app.config[f'TRENDING_{key}']
+
+    def _new_sketch(self):
+        return CountMinSketch(self._config('SKETCH_WIDTH'), self._config('SKETCH_DEPTH'))
+
+    def _bucket_start(self, at):
+        size = self._config('BUCKET_SECONDS')
+        return EPOCH + timedelta(seconds=int((at - EPOCH).total_seconds()) // size * size)
+
+    def _horizon(self, now, seconds):
+        # Start of the oldest bucket that belongs to a window of ``seconds``
+        return self._bucket_start(now - timedelta(seconds=seconds)) + timedelta(seconds=self._config('BUCKET_SECONDS'))
+
+    # — writing —
+    def record(self, tags, at=None):
+        """Count one tweet's (normalized) ``tags``."""
+        now = datetime.utcnow()
+        at = at or now
+        if at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+        longest = max(self._config('WINDOWS').values())
+        if not tags or at < self._horizon(now, longest) or at > now + timedelta(minutes=5):
+            return
+        start = self._bucket_start(at)
+        with self._lock:
+            bucket = self._buckets.get(start)
+            if bucket is None:
+                bucket = self._buckets[start] = Bucket(self._new_sketch(), TopK(self._config('CANDIDATES')))
+            pending = self._pending.setdefault(start, Counter())
+            for tag in tags:
+                bucket.candidates.update(tag, bucket.sketch.add(tag))
+                pending[tag] += 1
+            for window in self._windows.values():
+                if start >= window.horizon:
+                    for tag in tags:
+                        window.scores[tag] = self._score(tag, window.horizon)
+                    window.ranking = None
+        self._ensure_timer()
+
+    # — reading —
+    def top(self, window, n=None):
+        """``[(tag, estimated count)]`` for ``window`` (e.g. ``'1h'``), highest first."""
+        n = n or self._config('TOP_K')
+        # Processes that only read still need the timer to see other processes' counts
+        self._ensure_timer()
+        if not self._loaded:
+            self.refresh()
+        horizon = self._horizon(datetime.utcnow(), self._config('WINDOWS')[window])
+        with self._lock:
+            state = self._windows.get(window)
+            if state is None or state.horizon != horizon:
+                state = self._windows[window] = self._rebuild(horizon)
+            if state.ranking is None:
+                state.ranking = heapq.nlargest(self._config('TOP_K'), state.scores.items(),
+                                               key=lambda pair: (pair[1], pair[0]))
+            return state.ranking[:n]
+
+    def _score(self, tag, horizon):
+        cells = sketch_cells(tag, self._config('SKETCH_WIDTH'), self._config('SKETCH_DEPTH'))
+        return sum(bucket.sketch.estimate(tag, cells) for start, bucket in self._buckets.items() if start >= horizon)
+
+    def _rebuild(self, horizon):
+        candidates = {tag for start, bucket in self._buckets.items() if start >= horizon
+                      for tag in bucket.candidates.items}
+        return WindowRanking(horizon, {tag: self._score(tag, horizon) for tag in candidates})
+
+    # — persistence —
+    def flush(self):
+        """Merge the counts recorded since the last flush into the stored buckets."""
+        if self.app is None:
+            return 0
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            with self.app.app_context():
+                for start, counts in sorted(pending.items()):
+                    self._merge_bucket(start, counts)
+                db.session.commit()
+        except Exception:
+            logger.exception('Could not persist trending counts for %d buckets', len(pending))
+            with self._lock:
+                for start, counts in pending.items():
+                    self._pending.setdefault(start, Counter()).update(counts)
+            return 0
+        return sum(sum(counts.values()) for counts in pending.values())
+
+    def _merge_bucket(self, start, counts):
+        row = db.session.execute(
+            select(TrendingBucket).where(TrendingBucket.bucket_start == start).with_for_update()
+        ).scalar_one_or_none()
+        width, depth = self._config('SKETCH_WIDTH'), self._config('SKETCH_DEPTH')
+        if row is None:
+            row = TrendingBucket(bucket_start=start)
+            db.session.add(row)
+            sketch, candidates = CountMinSketch(width, depth), TopK(self._config('CANDIDATES'))
+        else:
+            sketch = CountMinSketch.from_bytes(row.sketch, width, depth)
+            candidates = TopK(self._config('CANDIDATES'), json.loads(row.candidates))
+        for tag, count in counts.items():
+            candidates.update(tag, sketch.add(tag, count))
+        row.sketch = sketch.to_bytes()
+        row.candidates = json.dumps(candidates.items)
+        row.updated_at = datetime.utcnow()
+
+    def refresh(self):
+        """Reload buckets changed in the database and drop the expired ones."""
+        self._ensure_timer()
+        now = datetime.utcnow()
+        horizon = self._horizon(now, max(self._config('WINDOWS').values()))
+        try:
+            with self.app.app_context():
+                versions = dict(db.session.execute(
+                    select(TrendingBucket.bucket_start, TrendingBucket.updated_at)
+                    .where(TrendingBucket.bucket_start >= horizon)
+                ).all())
+                changed = [start for start, updated in versions.items() if self._versions.get(start) != updated]
+                rows = db.session.execute(
+                    select(TrendingBucket).where(TrendingBucket.bucket_start.in_(changed))
+                ).scalars().all() if changed else []
+                loaded = {
+                    row.bucket_start: (row.updated_at, row.sketch, json.loads(row.candidates)) for row in rows
+                }
+        except Exception:
+            logger.exception('Could not load trending buckets')
+            self._loaded = True  # serve what is in memory rather than retry on every request
+            return
+
+        width, depth, k = self._config('SKETCH_WIDTH'), self._config('SKETCH_DEPTH'), self._config('CANDIDATES')
+        with self._lock:
+            for start, (updated_at, sketch, candidates) in loaded.items():
+                bucket = Bucket(CountMinSketch.from_bytes(sketch, width, depth), TopK(k, candidates))
+                # Counts recorded here but not flushed yet are not in the stored row
+                for tag, count in self._pending.get(start, {}).items():
+                    bucket.candidates.update(tag, bucket.sketch.add(tag, count))
+                self._buckets[start] = bucket
+                self._versions[start] = updated_at
+            for start in [start for start in self._buckets if start < horizon]:
+                del self._buckets[start]
+                self._versions.pop(start, None)
+            self._windows.clear()
+            self._loaded = True
+
+    def prune(self):
+        """Delete stored buckets that left the longest window."""
+        horizon = self._horizon(datetime.utcnow(), max(self._config('WINDOWS').values()))
+        with self.app.app_context():
+            db.session.execute(delete(TrendingBucket).where(TrendingBucket.bucket_start < horizon))
+            db.session.commit()
+
+    # — background timer —
+    def _ensure_timer(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run_timer, name='trending-sync', daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run_timer(self):
+        while not self._stop.wait(self._config('FLUSH_INTERVAL')):
+            self.flush()
+            self.refresh()
+            try:
+                self.prune()
+            except Exception:
+                logger.exception('Could not prune trending buckets')
+
+
+trending = TrendingTracker()
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 tweets_bp = Blueprint('tweets', __name__)
 
-from . import routes
+from . import routes, commands
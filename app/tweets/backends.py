@@ -0,0 +1,120 @@
+"""Ways of running the enrichment models on CPU.
+
+Every backend builds a ``transformers`` pipeline, so callers see the same
+inputs and outputs whichever one is configured:
+
+- ``pytorch``: the eager fp32 model, as published.
+- ``pytorch-int8``: the same model with its ``Linear`` layers dynamically
+  quantized to int8; no export step, usually 2-3x faster on CPU.
+- ``onnx``: the model exported to ONNX and run by ONNX Runtime.  Needs
+  ``optimum[onnxruntime]``; the export is written once to
+  ``ONNX_EXPORT_DIR`` and reused afterwards.
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = {}
+
+# Set by configure(); read when the first model is loaded
+_settings = {'threads': 0, 'interop_threads': 0, 'onnx_dir': None}
+_torch_configured = False
+_torch_lock = threading.Lock()
+
+
+def register_backend(name):
+    """Register ``loader(task, model)`` as the backend ``name``."""
+    def decorator(loader):
+        BACKENDS[name] = loader
+        return loader
+    return decorator
+
+
+def configure(threads=0, interop_threads=0, onnx_dir=None):
+    """Thread counts (0 keeps the library default) and where ONNX exports go."""
+    _settings.update(threads=threads, interop_threads=interop_threads, onnx_dir=onnx_dir)
+
+
+def parse_backends(value):
+    """``'sentiment=onnx,grammar=pytorch-int8'`` -> ``{'sentiment': 'onnx', 'grammar': 'pytorch-int8'}``."""
+    backends = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        name, _, backend = item.partition('=')
+        backends[name.strip()] = backend.strip()
+    return backends
+
+
+def _configure_torch():
+    global _torch_configured
+    with _torch_lock:
+        if _torch_configured:
+            return
+        import torch
+
+        if _settings['threads']:
+            torch.set_num_threads(_settings['threads'])
+        if _settings['interop_threads']:
+            try:
+                torch.set_num_interop_threads(_settings['interop_threads'])
+            except RuntimeError:  # only allowed before torch runs anything in parallel
+                logger.warning('torch inter-op threads already started; keeping %d',
+                               torch.get_num_interop_threads())
+        _torch_configured = True
+
+
+# ——— BACKENDS —————————————————————————————————————————————————————————————
+@register_backend('pytorch')
+def load_pytorch(task, model):
+    # transformers pulls in torch; importing it here instead of at module
+    # level keeps create_app(), the CLI and migrations free of that cost.
+    from transformers import pipeline
+
+    _configure_torch()
+    return pipeline(task, model=model)
+
+
+@register_backend('pytorch-int8')
+def load_pytorch_int8(task, model):
+    import torch
+    from transformers import pipeline
+
+    _configure_torch()
+    pipeline_ = pipeline(task, model=model)
+    pipeline_.model = torch.ao.quantization.quantize_dynamic(pipeline_.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline_
+
+
+ONNX_MODEL_CLASSES = {
+    'sentiment-analysis': 'ORTModelForSequenceClassification',
+    'text2text-generation': 'ORTModelForSeq2SeqLM',
+}
+
+
+@register_backend('onnx')
+def load_onnx(task, model):
+    import onnxruntime
+    import optimum.onnxruntime
+    from transformers import AutoTokenizer, pipeline
+
+    model_class = getattr(optimum.onnxruntime, ONNX_MODEL_CLASSES[task])
+    options = onnxruntime.SessionOptions()
+    if _settings['threads']:
+        options.intra_op_num_threads = _settings['threads']
+    if _settings['interop_threads']:
+        options.inter_op_num_threads = _settings['interop_threads']
+
+    export_dir = os.path.join(_settings['onnx_dir'], model.strip('/').replace('/', '--')) \
+        if _settings['onnx_dir'] else None
+    if export_dir and os.path.isdir(export_dir):
+        ort_model = model_class.from_pretrained(export_dir, session_options=options)
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    else:
+        logger.info('Exporting %s to ONNX', model)
+        ort_model = model_class.from_pretrained(model, export=True, session_options=options)
+        tokenizer = AutoTokenizer.from_pretrained(model)
+        if export_dir:
+            ort_model.save_pretrained(export_dir)
+            tokenizer.save_pretrained(export_dir)
+    return pipeline(task, model=ort_model, tokenizer=tokenizer)
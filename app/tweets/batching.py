@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class InferenceOverloaded(Exception):
+    """A model's queue is full; callers should degrade rather than wait."""
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item calls into batched calls.
+
+    Callers ``submit`` one item and get a ``Future``.  A single worker thread
+    collects items until ``max_batch_size`` is reached or ``max_wait_ms`` has
+    passed since the first one arrived, runs ``run_batch`` on the whole list
+    and hands each result back to its caller.  Running one batch at a time
+    also keeps the (not thread-safe) model pipelines on a single thread.
+    """
+
+    def __init__(self, name, run_batch, max_batch_size=16, max_wait_ms=10, max_queue_size=0):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size  # 0 = unbounded
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        BATCHERS[name] = self
+
+    def submit(self, item):
+        self._ensure_started()
+        if self.max_queue_size and self._queue.qsize() >= self.max_queue_size:
+            with self._stats_lock:
+                self._stats['rejected'] += 1
+            raise InferenceOverloaded(f'{self.name} has {self._queue.qsize()} items queued')
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Run ``item``; raises ``TimeoutError`` after ``timeout`` seconds (it still runs)."""
+        return self.submit(item).result(timeout)
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so every process starts its own.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, name=f'batcher-{self.name}', daemon=True).start()
+                self._pid = os.getpid()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _, _ in batch]
+            started = time.perf_counter()
+            try:
+                results = self.run_batch(items)
+                error = None
+            except Exception as exc:
+                results, error = None, exc
+            finished = time.perf_counter()
+
+            for i, (_, future, _) in enumerate(batch):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[i])
+            self._record(batch, started, finished)
+
+    def _record(self, batch, started, finished):
+        with self._stats_lock:
+            stats = self._stats
+            stats['batches'] += 1
+            stats['items'] += len(batch)
+            stats['max_batch_size_seen'] = max(stats['max_batch_size_seen'], len(batch))
+            stats['busy_seconds'] += finished - started
+            for _, _, queued_at in batch:
+                stats['queue_wait_seconds'] += started - queued_at
+                stats['latency_seconds'] += finished - queued_at
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {
+                'batches': 0,
+                'items': 0,
+                'max_batch_size_seen': 0,
+                'busy_seconds': 0.0,
+                'queue_wait_seconds': 0.0,
+                'latency_seconds': 0.0,
+                'rejected': 0,
+            }
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        items = stats['items'] or 1
+        stats.update(
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.max_wait_ms,
+            queue_depth=self._queue.qsize(),
+            avg_batch_size=stats['items'] / (stats['batches'] or 1),
+            avg_queue_wait_ms=stats['queue_wait_seconds'] * 1000 / items,
+            avg_latency_ms=stats['latency_seconds'] * 1000 / items,
+            items_per_second=stats['items'] / stats['busy_seconds'] if stats['busy_seconds'] else 0.0,
+        )
+        return stats
+
+
+BATCHERS = {}
+
+
+def init_app(app):
+    for batcher in BATCHERS.values():
+        batcher.max_batch_size = app.config['INFERENCE_MAX_BATCH_SIZE']
+        batcher.max_wait_ms = app.config['INFERENCE_MAX_WAIT_MS']
+        batcher.max_queue_size = app.config['INFERENCE_MAX_QUEUE']
+
+
+def batching_stats():
+    return {name: batcher.stats() for name, batcher in BATCHERS.items()}
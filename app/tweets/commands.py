@@ -0,0 +1,210 @@
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, select, update
+
+from app.extensions import db
+from app.fragments import fragment_cache
+from app.models import Tweet, Like, Comment
+from app.search import rebuild_index
+from app.tweets import tweets_bp
+from app.tweets.enrichment import enqueue_enrichment, enrichment_summary, enrichment_worker
+from app.tweets.importer import TweetImporter
+from app.tweets.reenrich import MODELS as REENRICH_MODELS, Reenricher
+from app.tweets.backends import BACKENDS
+from app.tweets.inference import MODEL_IDS, compare_backends, use_server, warmup as warmup_models
+from app.tweets.inference_server import InferenceServer
+
+models_cli = AppGroup('models', help='Manage the enrichment models.')
+
+
+@tweets_bp.cli.command('recount')
+def recount():
+    """Recompute the like/comment counters on every tweet."""
+    likes = select(func.count(Like.id)).where(Like.tweet_id == Tweet.id).scalar_subquery()
+    comments = select(func.count(Comment.id)).where(Comment.tweet_id == Tweet.id).scalar_subquery()
+    result = db.session.execute(
+        update(Tweet)
+        .values(like_count=likes, comment_count=comments)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    fragment_cache.clear()
+    click.echo(f'Recounted likes and comments for {result.rowcount} tweets.')
+
+
+@tweets_bp.cli.command('reindex')
+def reindex():
+    """Rebuild the full-text search index over tweet content."""
+    if rebuild_index():
+        click.echo('Full-text index rebuilt.')
+    else:
+        click.echo(f'No full-text index for the {db.engine.dialect.name} backend; search uses LIKE.')
+
+
+@tweets_bp.cli.command('worker')
+@click.option('--once', is_flag=True, help='Drain the runnable jobs and exit.')
+def worker(once):
+    """Process queued grammar/sentiment/hashtag enrichment jobs."""
+    if once:
+        total = 0
+        while processed := enrichment_worker.run_once(limit=50):
+            total += processed
+        click.echo(f'Processed {total} enrichment jobs.')
+        return
+    click.echo('Enrichment worker running, press Ctrl+C to stop.')
+    enrichment_worker.run_forever()
+
+
+@tweets_bp.cli.command('enrichment-status')
+@click.option('--retry-failed', is_flag=True, help='Re-queue tweets whose enrichment failed.')
+def enrichment_status(retry_failed):
+    """Show how many tweets are pending, enriched or failed."""
+    if retry_failed:
+        tweets = Tweet.query.filter_by(enrichment_status='failed').all()
+        for tweet in tweets:
+            enqueue_enrichment(tweet)
+        db.session.commit()
+        click.echo(f'Re-queued {len(tweets)} tweets.')
+    for status, count in enrichment_summary().items():
+        click.echo(f'{status}: {count}')
+
+
+@tweets_bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']), help='Defaults to the file extension.')
+@click.option('--chunk-size', default=500, show_default=True, help='Rows per INSERT batch and commit.')
+@click.option('--processes', default=0, show_default=True, help='Enrichment worker processes (0 = in-process).')
+@click.option('--enrich/--no-enrich', default=True, show_default=True,
+              help='Run the models now, or queue the tweets for the enrichment worker.')
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help='Progress file for resuming [default: PATH.checkpoint].')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint.')
+def import_tweets(path, fmt, chunk_size, processes, enrich, checkpoint, restart):
+    """Bulk-load tweets from a JSONL or CSV file.
+
+    Each record needs ``content`` and a ``username`` or ``user_id``;
+    ``created_at`` (ISO 8601) and ``image`` are optional.
+    """
+    checkpoint = checkpoint or f'{path}.checkpoint'
+    if restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    def progress(state, rows_per_sec):
+        click.echo(f"{state['records']} records read, {state['imported']} imported, "
+                   f"{state['skipped']} skipped ({rows_per_sec:.0f} rows/s)")
+
+    importer = TweetImporter(chunk_size=chunk_size, processes=processes, enrich=enrich)
+    result = importer.run(path, fmt, checkpoint, progress)
+    click.echo(f"Imported {result['imported']} tweets in {result['seconds']:.1f}s "
+               f"({result['rows_per_sec']:.0f} rows/s), skipped {result['skipped']} invalid records.")
+    if not enrich:
+        click.echo('Run `flask tweets worker` to enrich the queued tweets.')
+
+
+@tweets_bp.cli.command('reenrich')
+@click.option('--model', 'models', multiple=True, type=click.Choice(REENRICH_MODELS),
+              help='Output to recompute (repeatable) [default: all].')
+@click.option('--since', type=click.DateTime(), help='Only tweets created at or after this date.')
+@click.option('--degraded', is_flag=True, help='Only tweets where a fallback stood in for the models re-run.')
+@click.option('--batch-size', default=256, show_default=True, help='Tweets per model batch and commit.')
+@click.option('--processes', default=0, show_default=True, help='Model worker processes (0 = in-process).')
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help='Progress file for resuming [default: reenrich.checkpoint in the instance folder].')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint.')
+def reenrich(models, since, degraded, batch_size, processes, checkpoint, restart):
+    """Recompute sentiment and hashtags of enriched tweets, e.g. after a model change.
+
+    Interrupted runs resume after the last committed tweet ID.
+    """
+    checkpoint = checkpoint or os.path.join(current_app.instance_path, 'reenrich.checkpoint')
+    if restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    def progress(state, rows_per_sec):
+        click.echo(f"{state['processed']} tweets processed, {state['updated']} updated, "
+                   f"last ID {state['last_id']} ({rows_per_sec:.0f} tweets/s)")
+
+    reenricher = Reenricher(models or REENRICH_MODELS, batch_size=batch_size, processes=processes,
+                            since=since, degraded=degraded)
+    try:
+        result = reenricher.run(checkpoint, progress)
+    except ValueError as exc:
+        raise click.UsageError(f'{exc}, or pass --restart.')
+    # Unlike an import, the next run (after the next model change) must start over
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    click.echo(f"Re-enriched {result['updated']} of {result['processed']} tweets in {result['seconds']:.1f}s "
+               f"({result['rows_per_sec']:.0f} tweets/s).")
+
+
+@models_cli.command('warmup')
+def warmup():
+    """Load every model and run a sample input through it."""
+    for name, seconds in warmup_models().items():
+        click.echo(f'{name}: {seconds:.2f}s')
+
+
+@models_cli.command('serve')
+@click.option('--address', envvar='INFERENCE_SERVER',
+              help='unix:///path/to.sock or tcp://127.0.0.1:PORT [default: INFERENCE_SERVER, '
+                   'else a socket in the instance folder].')
+def serve(address):
+    """Run the models in a server shared by every web worker.
+
+    Start the web workers with INFERENCE_SERVER set to the same address.
+    """
+    address = address or f"unix://{os.path.join(current_app.instance_path, 'inference.sock')}"
+    use_server(None)  # this process is the server; never forward to itself
+    for name, seconds in warmup_models().items():
+        click.echo(f'{name}: loaded in {seconds:.2f}s')
+    server = InferenceServer(address)
+    click.echo(f'Inference server listening on {address}, press Ctrl+C to stop.')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+@models_cli.command('compare')
+@click.option('--backend', 'candidates', multiple=True, type=click.Choice(sorted(BACKENDS)),
+              help='Backend to compare with eager PyTorch (repeatable) [default: all].')
+@click.option('--model', 'names', multiple=True, type=click.Choice(sorted(MODEL_IDS)),
+              help='Model to compare (repeatable) [default: all].')
+@click.option('--texts', 'texts_path', type=click.Path(exists=True, dir_okay=False),
+              help='One input per line [default: the latest tweets].')
+@click.option('--limit', default=64, show_default=True, help='Number of inputs.')
+@click.option('--runs', default=3, show_default=True, help='Timed passes over the inputs.')
+@click.option('--batch-size', default=8, show_default=True)
+@click.option('--min-agreement', type=float, help='Exit with an error below this share of identical outputs.')
+def compare(candidates, names, texts_path, limit, runs, batch_size, min_agreement):
+    """Check output parity and latency of the inference backends.
+
+    Set MODEL_DIR to run against local model files.
+    """
+    if texts_path:
+        with open(texts_path, encoding='utf-8') as f:
+            texts = [line.strip() for line in f if line.strip()][:limit]
+    else:
+        texts = db.session.execute(
+            select(Tweet.content).order_by(Tweet.id.desc()).limit(limit)
+        ).scalars().all()
+    if not texts:
+        raise click.UsageError('No inputs: the database has no tweets, pass --texts.')
+
+    failed = False
+    for name in names or sorted(MODEL_IDS):
+        click.echo(f'{name} ({len(texts)} inputs, batch size {batch_size}):')
+        report = compare_backends(name, candidates or sorted(BACKENDS), texts, runs, batch_size)
+        for backend, stats in report.items():
+            click.echo(f"  {backend:14} agreement {stats['agreement']:6.1%}  load {stats['load_s']:5.1f}s  "
+                       f"p50 {stats['p50_ms']:8.1f}ms  max {stats['max_ms']:8.1f}ms  "
+                       f"{stats['texts_per_s']:7.1f} texts/s")
+            if min_agreement is not None and stats['agreement'] < min_agreement:
+                failed = True
+    if failed:
+        raise click.ClickException(f'Some backends agree with PyTorch on less than {min_agreement:.0%} of inputs.')
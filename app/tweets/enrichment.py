@@ -0,0 +1,243 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+from app.extensions import db
+from app.fragments import fragment_cache
+from app.hashtags import set_tweet_hashtags, parse_hashtags
+from app.models import Tweet, EnrichmentJob
+from app.trending import trending
+from app.tweets.batching import InferenceOverloaded
+from app.tweets.fallbacks import keyword_hashtags, vader_sentiment
+from app.tweets.inference import correct_grammar, analyze_sentiment, generate_hashtags_hf
+from app.tweets.inference_server import InferenceServerError
+
+logger = logging.getLogger(__name__)
+
+
+# ——— QUEUE ————————————————————————————————————————————————————————————————
+def enqueue_enrichment(tweet):
+    """Mark ``tweet`` as pending and (re)queue its job; the caller commits."""
+    tweet.enrichment_status = 'pending'
+    job = tweet.enrichment_job
+    if job is None:
+        tweet.enrichment_job = EnrichmentJob()
+    else:
+        job.status = 'queued'
+        job.attempts = 0
+        job.last_error = None
+        job.locked_at = None
+        job.run_after = datetime.utcnow()
+
+
+def enrich_text(text, budgets=None):
+    """Grammar, sentiment and hashtags for ``text``, plus the path taken.
+
+    ``budgets`` maps a stage to the seconds its model may take.  A stage
+    over budget, whose model queue is full or whose inference server
+    failed falls back to a cheap path: grammar correction is skipped,
+    sentiment comes from VADER and hashtags from keywords.  The path is ``'models'``, or ``'fallback:'`` and the
+    stages that fell back, so degraded tweets can be re-enriched later.
+    """
+    budgets = budgets or {}
+    fallbacks = []
+
+    def run(stage, model, fallback, text):
+        try:
+            return model(text, timeout=budgets.get(stage))
+        except (TimeoutError, InferenceOverloaded, InferenceServerError) as exc:
+            logger.warning('%s model over budget or unavailable, using the fallback: %s', stage, str(exc) or 'timed out')
+            fallbacks.append(stage)
+            return fallback(text)
+
+    corrected_text = run('grammar', correct_grammar, lambda t: t, text)
+    sentiment = run('sentiment', analyze_sentiment, fallback_sentiment, corrected_text)
+    hashtags = run('hashtags', generate_hashtags_hf, keyword_hashtags, corrected_text)
+    path = f"fallback:{','.join(fallbacks)}" if fallbacks else 'models'
+    return corrected_text, sentiment, hashtags, path
+
+
+def fallback_sentiment(text):
+    try:
+        return vader_sentiment(text)
+    except Exception:
+        logger.exception('VADER sentiment failed')
+        return 'NEUTRAL'
+
+
+def _runnable(now, stale_after):
+    # Jobs left "running" by a worker that died are picked up again.
+    return or_(
+        and_(EnrichmentJob.status == 'queued', EnrichmentJob.run_after <= now),
+        and_(EnrichmentJob.status == 'running', EnrichmentJob.locked_at < now - stale_after),
+    )
+
+
+def claim_jobs(limit, stale_after):
+    now = datetime.utcnow()
+    candidates = db.session.execute(
+        select(EnrichmentJob.id)
+        .where(_runnable(now, stale_after))
+        .order_by(EnrichmentJob.run_after)
+        .limit(limit)
+    ).scalars().all()
+
+    claimed = []
+    for job_id in candidates:
+        # Conditional update so that two workers never claim the same job
+        result = db.session.execute(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.id == job_id, _runnable(now, stale_after))
+            .values(status='running', locked_at=now, attempts=EnrichmentJob.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            claimed.append(job_id)
+    db.session.commit()
+    return claimed
+
+
+def run_job(job_id, max_attempts, retry_delay, budgets=None):
+    job = db.session.get(EnrichmentJob, job_id)
+    if job is None:  # the tweet was deleted meanwhile
+        return
+    tweet_id = job.tweet_id
+    source_text = job.tweet.content
+
+    try:
+        corrected_text, sentiment, hashtags_list, path = enrich_text(source_text, budgets)
+    except Exception as exc:
+        logger.exception('Enrichment of tweet %s failed', tweet_id)
+        db.session.rollback()
+        _record_failure(job_id, exc, max_attempts, retry_delay)
+        return
+
+    # Only apply the result if the tweet was not edited while the models ran;
+    # an edit re-queues the job, so the newer text gets its own pass.
+    result = db.session.execute(
+        update(Tweet)
+        .where(Tweet.id == tweet_id, Tweet.content == source_text)
+        .values(content=corrected_text, sentiment=sentiment, enrichment_status='done', enrichment_path=path)
+        .execution_options(synchronize_session='fetch')
+    )
+    if not result.rowcount:
+        db.session.rollback()
+        return
+
+    set_tweet_hashtags(db.session.get(Tweet, tweet_id), hashtags_list)
+    db.session.delete(job)
+    db.session.commit()
+    fragment_cache.invalidate(tweet_id)
+    trending.record(parse_hashtags(' '.join(hashtags_list)))
+
+
+def _record_failure(job_id, exc, max_attempts, retry_delay):
+    job = db.session.get(EnrichmentJob, job_id)
+    if job is None:
+        return
+    job.last_error = f'{type(exc).__name__}: {exc}'[:255]
+    job.locked_at = None
+    if job.attempts >= max_attempts:
+        job.status = 'failed'
+        job.tweet.enrichment_status = 'failed'
+    else:
+        job.status = 'queued'
+        job.run_after = datetime.utcnow() + timedelta(seconds=retry_delay * 2 ** (job.attempts - 1))
+    db.session.commit()
+    fragment_cache.invalidate(job.tweet_id)
+
+
+def enrichment_summary():
+    counts = dict(
+        db.session.query(Tweet.enrichment_status, db.func.count(Tweet.id))
+        .group_by(Tweet.enrichment_status)
+        .all()
+    )
+    summary = {status: counts.get(status, 0) for status in ('pending', 'done', 'failed')}
+    # Enriched by the fallbacks, worth re-enriching once the models keep up
+    summary['degraded'] = db.session.query(db.func.count(Tweet.id)) \
+        .filter(Tweet.enrichment_path.like('fallback:%')).scalar()
+    return summary
+
+
+# ——— WORKER ———————————————————————————————————————————————————————————————
+class EnrichmentWorker:
+    """Background threads that drain the enrichment job table.
+
+    Threads are started lazily on the first request of each process, so a
+    forking server gets its own workers in every child.  Jobs live in the
+    database, so several processes (or ``flask tweets worker``) can share
+    the queue without an external broker.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['enrichment_worker'] = self
+        app.before_request(self.ensure_started)
+
+    def ensure_started(self):
+        threads = self.app.config['ENRICHMENT_WORKERS']
+        if threads <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            for i in range(threads):
+                threading.Thread(target=self.run_forever, name=f'enrichment-{i}', daemon=True).start()
+            self._pid = os.getpid()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def run_once(self, limit=None):
+        """Claim up to ``limit`` jobs (one model batch by default) and run them.
+
+        The claimed jobs run side by side, one thread each, so their
+        single-text model calls reach the micro-batchers together and go
+        through the models as one batch per stage.  Run one by one, every
+        batch would hold a single text.
+        """
+        config = self.app.config
+        batch_size = config['INFERENCE_MAX_BATCH_SIZE']
+        job_ids = claim_jobs(limit or batch_size, timedelta(seconds=config['ENRICHMENT_STALE_AFTER']))
+        if len(job_ids) > 1:
+            with ThreadPoolExecutor(min(len(job_ids), batch_size), thread_name_prefix='enrichment-job') as pool:
+                # list() re-raises the first error, after every job has run
+                list(pool.map(self._run_job, job_ids))
+        elif job_ids:
+            self._run_job(job_ids[0])
+        return len(job_ids)
+
+    def _run_job(self, job_id):
+        config = self.app.config
+        # Every thread needs its own app context, and so its own session
+        with self.app.app_context():
+            run_job(job_id, config['ENRICHMENT_MAX_ATTEMPTS'], config['ENRICHMENT_RETRY_DELAY'],
+                    config['ENRICHMENT_BUDGETS'])
+
+    def run_forever(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    processed = self.run_once()
+            except Exception:
+                logger.exception('Enrichment worker iteration failed')
+                processed = 0
+            if not processed:
+                self._wakeup.wait(self.app.config['ENRICHMENT_POLL_INTERVAL'])
+                self._wakeup.clear()
+
+
+enrichment_worker = EnrichmentWorker()
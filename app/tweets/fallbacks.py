@@ -0,0 +1,70 @@
+"""Cheap stand-ins for the models, used when they are too slow or overloaded."""
+import logging
+import re
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Same thresholds as the VADER paper for calling a text positive/negative
+VADER_THRESHOLD = 0.05
+
+STOPWORDS = frozenset((
+    'a about after again all also am an and any are as at be because been before being but by can could '
+    'did do does doing down during each few for from further had has have having he her here hers him his '
+    'how i if in into is it its just like me more most my no nor not now of off on once only or other our '
+    'out over own same she should so some such than that the their them then there these they this those '
+    'through to too under until up very was we were what when where which while who whom why will with '
+    'would you your yours today really still get got going gonna one'
+).split())
+
+_WORD = re.compile(r"#?[a-z][a-z']+")
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+# ——— SENTIMENT ———————————————————————————————————————————————————————————————
+def _get_analyzer():
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            import nltk
+            from nltk.sentiment import SentimentIntensityAnalyzer
+
+            try:
+                _analyzer = SentimentIntensityAnalyzer()
+            except LookupError:
+                # The lexicon is a separate ~100 KB download from the nltk package
+                logger.info('Downloading the VADER lexicon')
+                nltk.download('vader_lexicon', quiet=True, raise_on_error=True)
+                _analyzer = SentimentIntensityAnalyzer()
+        return _analyzer
+
+
+def vader_sentiment(text: str) -> str:
+    """POSITIVE/NEGATIVE/NEUTRAL from NLTK's rule-based VADER analyzer."""
+    compound = _get_analyzer().polarity_scores(text)['compound']
+    if compound >= VADER_THRESHOLD:
+        return 'POSITIVE'
+    if compound <= -VADER_THRESHOLD:
+        return 'NEGATIVE'
+    return 'NEUTRAL'
+
+
+# ——— HASHTAGS ————————————————————————————————————————————————————————————————
+def keyword_hashtags(text: str, max_tags=5) -> list[str]:
+    """Hashtags the author wrote, then the most frequent non-stopwords."""
+    words = _WORD.findall(text.lower())
+    tags = [word[1:] for word in words if word.startswith('#')]
+    counts = Counter(
+        word for word in words
+        if not word.startswith('#') and "'" not in word and len(word) > 3 and word not in STOPWORDS
+    )
+    # most_common keeps first-seen order among equal counts
+    tags += [word for word, _ in counts.most_common()]
+    unique_tags = []
+    for tag in tags:
+        if tag not in unique_tags:
+            unique_tags.append(tag)
+    return [f'#{tag}' for tag in unique_tags[:max_tags]]
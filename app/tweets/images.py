@@ -0,0 +1,97 @@
+import hashlib
+import io
+import os
+import re
+import uuid
+
+from flask import current_app, url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.models import Tweet
+from app.tweets import tweets_bp
+
+# Each variant is shrunk to fit IMAGE_<VARIANT>_SIZE, never enlarged
+VARIANTS = ('thumb', 'display')
+
+# Names stored in Tweet.image by the pipeline; anything else is a legacy original
+STORED_NAME = re.compile(r'^([0-9a-f]{32})\.(webp|jpg)$')
+
+
+def variant_filename(name, variant):
+    digest, ext = STORED_NAME.match(name).groups()
+    return f'{digest}_{variant}.{ext}'
+
+
+def _variant_path(name, variant):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], variant_filename(name, variant))
+
+
+def process_upload(file):
+    """Store resized copies of an uploaded image and return the name for ``Tweet.image``.
+
+    The upload is decoded once, rotated according to its EXIF orientation
+    and re-encoded without any metadata into one file per variant.  Files
+    are named after a hash of the upload, so identical images share
+    storage and are only processed once.  Returns None if the file is not
+    a readable image.
+    """
+    config = current_app.config
+    data = file.read()
+    ext = 'webp' if config['IMAGE_FORMAT'] == 'WEBP' else 'jpg'
+    name = f'{hashlib.sha256(data).hexdigest()[:32]}.{ext}'
+    if all(os.path.exists(_variant_path(name, variant)) for variant in VARIANTS):
+        return name
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+    # Animated GIFs keep their first frame
+    image = ImageOps.exif_transpose(image)
+    if ext == 'jpg' or image.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if ext == 'webp' and has_alpha else 'RGB')
+
+    for variant in VARIANTS:
+        resized = image.copy()
+        resized.thumbnail(config[f'IMAGE_{variant.upper()}_SIZE'], Image.LANCZOS)
+        path = _variant_path(name, variant)
+        # Write-then-rename, so a concurrent upload of the same image never sees half a file
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        resized.save(tmp_path, config['IMAGE_FORMAT'], quality=config['IMAGE_QUALITY'], optimize=True)
+        os.replace(tmp_path, path)
+    return name
+
+
+def known_image(name):
+    """Whether ``name`` may go in ``Tweet.image``: a pipeline name or an existing upload."""
+    if not isinstance(name, str) or not name:
+        return False
+    if STORED_NAME.match(name):
+        return True
+    # Legacy names are plain files in the upload folder, never paths out of it
+    return os.path.basename(name) == name and not name.startswith('.') and \
+        os.path.isfile(os.path.join(current_app.config['UPLOAD_FOLDER'], name))
+
+
+def release_image(name, tweet_id):
+    """Delete ``name``'s files unless a tweet other than ``tweet_id`` still shows it."""
+    if not name or Tweet.query.filter(Tweet.image == name, Tweet.id != tweet_id).first() is not None:
+        return
+    if STORED_NAME.match(name):
+        paths = [_variant_path(name, variant) for variant in VARIANTS]
+    else:
+        paths = [os.path.join(current_app.config['UPLOAD_FOLDER'], name)]
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@tweets_bp.app_template_global()
+def image_url(name, variant='thumb'):
+    if not STORED_NAME.match(name):  # uploaded before the pipeline existed
+        return url_for('static', filename='uploads/' + name)
+    return url_for('static', filename='uploads/' + variant_filename(name, variant))
@@ -0,0 +1,287 @@
+import csv
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+
+from sqlalchemy import insert, select, text
+
+from app.cache import LRUCache
+from app.extensions import db
+from app.hashtags import get_or_create_hashtag_ids, parse_hashtags
+from app.trending import trending
+from app.models import User, Tweet, TweetHashtag, EnrichmentJob
+from app.tweets.enrichment import fallback_sentiment
+from app.tweets.fallbacks import keyword_hashtags
+from app.tweets.images import known_image
+from app.tweets.inference import correct_grammar_batch, analyze_sentiment_batch, generate_hashtags_batch
+from app.tweets.inference_server import InferenceServerError
+
+logger = logging.getLogger(__name__)
+
+MAX_CONTENT_LENGTH = 280
+# Rows per multi-row INSERT on MySQL, well below its 65535 placeholders per statement
+MULTI_ROW_INSERT_SIZE = 1000
+
+
+# ——— INPUT ————————————————————————————————————————————————————————————————
+def read_records(path, fmt=None):
+    """Yield one dict per tweet from a JSONL or CSV file without loading it whole."""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            line = line.strip()
+            # Blank and malformed lines still count as (invalid) records so
+            # checkpoints stay aligned and a resume gets past them
+            try:
+                record = json.loads(line) if line else {}
+            except ValueError:
+                record = {}
+            yield record if isinstance(record, dict) else {}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# ——— CHECKPOINT ———————————————————————————————————————————————————————————
+def load_checkpoint(path, default):
+    """The state saved at ``path``, or a copy of ``default`` if there is none."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return dict(default)
+
+
+def save_checkpoint(path, state):
+    # Write-then-rename, so a crash never leaves a truncated checkpoint
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+# ——— ENRICHMENT ———————————————————————————————————————————————————————————
+def enrich_texts(texts):
+    """Batched ``enrich_text``; module-level so a process pool can pickle it."""
+    fallbacks = []
+
+    def run(stage, model, fallback, texts):
+        try:
+            return model(texts)
+        except InferenceServerError as exc:
+            logger.warning('%s model unavailable, using the fallback for %d tweets: %s', stage, len(texts), exc)
+            fallbacks.append(stage)
+            return [fallback(text) for text in texts]
+
+    corrected = run('grammar', correct_grammar_batch, lambda t: t, texts)
+    sentiments = run('sentiment', analyze_sentiment_batch, fallback_sentiment, corrected)
+    hashtags = run('hashtags', generate_hashtags_batch, keyword_hashtags, corrected)
+    path = f"fallback:{','.join(fallbacks)}" if fallbacks else 'models'
+    return corrected, sentiments, hashtags, path
+
+
+def _enrich_inline(texts):
+    future = Future()
+    future.set_result(enrich_texts(texts))
+    return future
+
+
+def _user_key(record):
+    # Records name their author by ``user_id`` (a number, or digits in CSV) or by ``username``
+    user_id = record.get('user_id')
+    if user_id not in (None, ''):
+        if isinstance(user_id, int) and not isinstance(user_id, bool):
+            return user_id
+        if isinstance(user_id, str) and user_id.strip().isdigit():
+            return int(user_id)
+        return None
+    username = record.get('username')
+    return username if isinstance(username, str) and username else None
+
+
+def _created_at(value):
+    """Naive UTC datetime from an ISO 8601 string; raises ValueError/TypeError if invalid."""
+    created_at = datetime.fromisoformat(value)
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at
+
+
+# ——— IMPORTER —————————————————————————————————————————————————————————————
+class TweetImporter:
+    """Stream tweets from a file into the database in fixed-size chunks.
+
+    Each chunk is validated, enriched with the batched model calls (in a
+    process pool when ``processes`` > 0) and written with executemany
+    INSERTs, then committed together with a checkpoint of how many input
+    records are done.  At most ``2 * processes`` chunks are in flight, so
+    memory stays bounded by the chunk size, not the file size.
+
+    A crash between a commit and its checkpoint write re-imports at most
+    that one chunk on resume.
+    """
+
+    def __init__(self, chunk_size=500, processes=0, enrich=True):
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.enrich = enrich
+        self._user_ids = LRUCache(10000)  # username or id -> id, for known users only
+
+    def run(self, path, fmt=None, checkpoint_path=None, progress=None):
+        state = {'records': 0, 'imported': 0, 'skipped': 0}
+        if checkpoint_path:
+            state = load_checkpoint(checkpoint_path, state)
+        records = islice(read_records(path, fmt), state['records'], None)
+        started = time.perf_counter()
+        imported_now = 0
+
+        pool = ProcessPoolExecutor(self.processes) if self.enrich and self.processes > 0 else None
+        try:
+            for size, rows, enriched in self._pipeline(chunked(records, self.chunk_size), pool):
+                inserted = self.insert_rows(rows, enriched.result() if enriched else None)
+                db.session.commit()
+
+                imported_now += inserted
+                state['records'] += size
+                state['imported'] += inserted
+                state['skipped'] += size - inserted
+                if checkpoint_path:
+                    save_checkpoint(checkpoint_path, state)
+                if progress:
+                    progress(state, imported_now / (time.perf_counter() - started))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        elapsed = time.perf_counter() - started
+        return dict(state, seconds=elapsed, rows_per_sec=imported_now / elapsed if elapsed else 0.0)
+
+    def _pipeline(self, chunks, pool):
+        # Keep a small window of chunks enriching ahead of the one being inserted
+        window = deque()
+        depth = 2 * self.processes if pool is not None else 1
+        for chunk in chunks:
+            rows = self.prepare(chunk)
+            enriched = None
+            if self.enrich and rows:
+                texts = [row['content'] for row in rows]
+                enriched = pool.submit(enrich_texts, texts) if pool is not None else _enrich_inline(texts)
+            window.append((len(chunk), rows, enriched))
+            if len(window) >= depth:
+                yield window.popleft()
+        yield from window
+
+    def prepare(self, records):
+        """Validate ``records`` and map them to ``tweet`` rows; invalid ones are dropped."""
+        self._resolve_users(records)
+        rows = []
+        for record in records:
+            content = record.get('content')
+            content = content.strip() if isinstance(content, str) else ''
+            user_id = self._user_ids.get(_user_key(record))
+            if not content or len(content) > MAX_CONTENT_LENGTH or user_id is None:
+                continue
+            try:
+                created_at = _created_at(record['created_at']) if record.get('created_at') else None
+            except (TypeError, ValueError):
+                continue
+            image = record.get('image')
+            rows.append({
+                'content': content,
+                'user_id': user_id,
+                # Unknown names are dropped: deleting the tweet later removes the named file
+                'image': image if known_image(image) else None,
+                'created_at': created_at or datetime.utcnow(),
+            })
+        return rows
+
+    def _resolve_users(self, records):
+        keys = {_user_key(record) for record in records} - {None}
+        missing = [key for key in keys if self._user_ids.get(key) is None]
+        ids = [key for key in missing if isinstance(key, int)]
+        usernames = [key for key in missing if isinstance(key, str)]
+        if ids:
+            for user_id in db.session.execute(select(User.id).where(User.id.in_(ids))).scalars():
+                self._user_ids.set(user_id, user_id)
+        if usernames:
+            for username, user_id in db.session.execute(
+                select(User.username, User.id).where(User.username.in_(usernames))
+            ):
+                self._user_ids.set(username, user_id)
+
+    def insert_rows(self, rows, enriched):
+        if not rows:
+            return 0
+        tag_lists = [[] for _ in rows]
+        if enriched is None:
+            for row in rows:
+                row.update(sentiment=None, hashtags='', enrichment_status='pending', enrichment_path=None)
+        else:
+            *outputs, path = enriched
+            for row, content, sentiment, hashtags_list, tags in zip(rows, *outputs, tag_lists):
+                tags.extend(parse_hashtags(' '.join(hashtags_list)))
+                row.update(content=content, sentiment=sentiment, hashtags=' '.join(f'#{tag}' for tag in tags),
+                           enrichment_status='done', enrichment_path=path)
+
+        tweet_ids = self._insert_tweets(rows)
+
+        if enriched is None:
+            now = datetime.utcnow()
+            db.session.execute(insert(EnrichmentJob.__table__), [
+                {'tweet_id': tweet_id, 'run_after': now, 'created_at': now} for tweet_id in tweet_ids
+            ])
+        else:
+            hashtag_ids = get_or_create_hashtag_ids(sorted({tag for tags in tag_lists for tag in tags}))
+            links = [
+                {'tweet_id': tweet_id, 'hashtag_id': hashtag_ids[tag]}
+                for tweet_id, tags in zip(tweet_ids, tag_lists) for tag in tags
+            ]
+            if links:
+                db.session.execute(insert(TweetHashtag.__table__), links)
+            for row, tags in zip(rows, tag_lists):
+                trending.record(tags, at=row['created_at'])
+        return len(rows)
+
+    def _insert_tweets(self, rows):
+        table = Tweet.__table__
+        if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+            statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+            return db.session.execute(statement, rows).scalars().all()
+        if db.engine.dialect.name in ('mysql', 'mariadb'):
+            step = db.session.execute(text('SELECT @@auto_increment_increment')).scalar()
+            return [tweet_id for part in chunked(rows, MULTI_ROW_INSERT_SIZE)
+                    for tweet_id in self._insert_multi_row(part, step)]
+        # Other backends without RETURNING: one INSERT per row
+        return [db.session.execute(insert(table), row).inserted_primary_key[0] for row in rows]
+
+    def _insert_multi_row(self, rows, step):
+        """Insert ``rows`` with one statement where there is no RETURNING (MySQL).
+
+        InnoDB reserves the ids of a multi-row INSERT in one go, so they run
+        by ``step`` (auto_increment_increment) from LAST_INSERT_ID().  They
+        are checked against what was stored; if other sessions' rows got
+        interleaved, the slice is inserted again row by row.
+        """
+        table = Tweet.__table__
+        savepoint = db.session.begin_nested()
+        first_id = db.session.execute(insert(table).values(rows)).lastrowid
+        tweet_ids = [first_id + i * step for i in range(len(rows))]
+        stored = {tuple(row) for row in db.session.execute(
+            select(table.c.id, table.c.user_id, table.c.content).where(table.c.id.in_(tweet_ids))
+        )}
+        if stored == {(tweet_id, row['user_id'], row['content']) for tweet_id, row in zip(tweet_ids, rows)}:
+            savepoint.commit()
+            return tweet_ids
+        savepoint.rollback()
+        return [db.session.execute(insert(table), row).inserted_primary_key[0] for row in rows]
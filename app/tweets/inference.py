@@ -0,0 +1,320 @@
+import gc
+import logging
+import os
+import statistics
+import time
+
+from app.instrumentation import inference_span
+from app.tweets import backends
+from app.tweets.batching import MicroBatcher
+from app.tweets.inference_server import InferenceClient, InferenceServerError
+from app.tweets.model_cache import model_cache
+from app.tweets.model_manager import model_manager
+
+logger = logging.getLogger(__name__)
+
+
+# ——— MODELS ————————————————————————————————————————————————————————————————
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+HASHTAG_MODEL = "t5-small"
+GRAMMAR_MODEL = "AventIQ-AI/T5-small-grammar-correction"
+
+MODEL_IDS = {
+    'sentiment': SENTIMENT_MODEL,
+    'hashtags': HASHTAG_MODEL,
+    'grammar': GRAMMAR_MODEL,
+}
+MODEL_TASKS = {
+    'sentiment': 'sentiment-analysis',
+    'hashtags': 'text2text-generation',
+    'grammar': 'text2text-generation',
+}
+
+# Backend per model and directory of local model copies; set by init_app()
+_backends = dict.fromkeys(MODEL_IDS, 'pytorch')
+_model_dir = None
+# Client of a shared inference server (INFERENCE_SERVER); None runs the models here
+_client = None
+# Whether to load the models here when the server fails (INFERENCE_SERVER_LOCAL_FALLBACK)
+_local_fallback = False
+
+
+def load_pipeline(task, model, backend='pytorch'):
+    return backends.BACKENDS[backend](task, model)
+
+
+def model_source(name):
+    """Local copy of the model under ``MODEL_DIR`` if there is one, else its hub ID."""
+    if _model_dir:
+        path = os.path.join(_model_dir, MODEL_IDS[name])
+        if os.path.isdir(path):
+            return path
+    return MODEL_IDS[name]
+
+
+def model_version(name):
+    """Model ID plus backend, as the output cache key: quantized outputs may differ."""
+    backend = _backends[name]
+    return MODEL_IDS[name] if backend == 'pytorch' else f'{MODEL_IDS[name]}@{backend}'
+
+
+def load_model(name, backend=None):
+    return load_pipeline(MODEL_TASKS[name], model=model_source(name), backend=backend or _backends[name])
+
+
+for _name in MODEL_IDS:
+    model_manager.register(_name, lambda name=_name: load_model(name))
+
+
+def _run_remote(name, texts):
+    """Results from the inference server, or ``None`` to run the model in-process.
+
+    Without the local fallback a server failure raises ``InferenceServerError``,
+    so callers take their cheap fallbacks instead of every worker loading the
+    models it was meant to share.
+    """
+    if _client is None:
+        return None
+    try:
+        return _client.run(name, texts)
+    except InferenceServerError as exc:
+        if not _local_fallback:
+            raise
+        logger.warning('Inference server unavailable, running %s in-process: %s', name, exc)
+        return None
+
+
+def use_server(client, local_fallback=False):
+    """Send model batches to ``client``'s server from now on; ``None`` runs them in-process."""
+    global _client, _local_fallback
+    _client = client
+    _local_fallback = local_fallback
+
+
+def server_client_stats():
+    return {_client.address: _client.stats()} if _client is not None else {}
+
+
+# ——— SENTIMENT ANALYSIS ———————————————————————————————————————————————————————
+def get_sentiment_pipeline():
+    return model_manager.get('sentiment')
+
+
+@inference_span('sentiment')
+def analyze_sentiment_batch(texts: list[str]) -> list[str]:
+    return model_cache.get_or_compute_many('sentiment', model_version('sentiment'), texts, _run_sentiment)
+
+
+def _run_sentiment(texts: list[str]) -> list[str]:
+    results = _run_remote('sentiment', texts)
+    if results is not None:
+        return results
+    with model_manager.use('sentiment') as pipeline_:
+        return _sentiment_outputs(pipeline_, texts)
+
+
+def _sentiment_outputs(pipeline_, texts: list[str]) -> list[str]:
+    results = pipeline_([text[:512] for text in texts], batch_size=len(texts))
+    labels = []
+    for result in results:
+        if isinstance(result, list):
+            result = result[0] if result else None
+        labels.append(result['label'] if result and 'label' in result else "NEUTRAL")
+    return labels
+
+
+_sentiment_batcher = MicroBatcher('sentiment', _run_sentiment)
+
+
+@inference_span('sentiment')
+def analyze_sentiment(text: str, timeout=None) -> str:
+    return model_cache.get_or_compute('sentiment', model_version('sentiment'), text,
+                                      lambda item: _sentiment_batcher(item, timeout))
+
+
+# ——— HASHTAG GENERATION ———————————————————————————————————————————————————————
+def get_hashtag_generator():
+    return model_manager.get('hashtags')
+
+
+def parse_generated_hashtags(hashtags_text: str, max_tags=5) -> list[str]:
+    tags = hashtags_text.replace('#', '').replace(',', ' ').split()
+    unique_tags = []
+    for tag in tags:
+        tag = tag.lower()
+        if tag.isalpha() and tag not in unique_tags:
+            unique_tags.append(tag)
+        if len(unique_tags) >= max_tags:
+            break
+    return [f"#{tag}" for tag in unique_tags]
+
+
+@inference_span('hashtags')
+def generate_hashtags_batch(texts: list[str], max_tags=5) -> list[list[str]]:
+    hashtags = model_cache.get_or_compute_many('hashtags', model_version('hashtags'), texts, _run_hashtags)
+    return [tags[:max_tags] for tags in hashtags]
+
+
+def _run_hashtags(texts: list[str], max_tags=5) -> list[list[str]]:
+    results = _run_remote('hashtags', texts)
+    if results is not None:
+        return [tags[:max_tags] for tags in results]
+    with model_manager.use('hashtags') as generator:
+        return _hashtag_outputs(generator, texts, max_tags)
+
+
+def _hashtag_outputs(generator, texts: list[str], max_tags=5) -> list[list[str]]:
+    prompts = [f"generate hashtags: {text}" for text in texts]
+    results = generator(prompts, max_length=50, num_return_sequences=1, batch_size=len(prompts))
+    hashtags = []
+    for result in results:
+        if isinstance(result, list):
+            result = result[0]
+        hashtags.append(parse_generated_hashtags(result['generated_text'], max_tags))
+    return hashtags
+
+
+_hashtag_batcher = MicroBatcher('hashtags', _run_hashtags)
+
+
+@inference_span('hashtags')
+def generate_hashtags_hf(text: str, max_tags=5, timeout=None) -> list[str]:
+    return model_cache.get_or_compute('hashtags', model_version('hashtags'), text,
+                                      lambda item: _hashtag_batcher(item, timeout))[:max_tags]
+
+
+# ——— GRAMMAR CORRECTION ——————————————————————————————————————————————————————
+def get_grammar_corrector():
+    return model_manager.get('grammar')
+
+
+@inference_span('grammar')
+def correct_grammar_batch(texts: list[str]) -> list[str]:
+    return model_cache.get_or_compute_many('grammar', model_version('grammar'), texts, _run_grammar)
+
+
+def _run_grammar(texts: list[str]) -> list[str]:
+    results = _run_remote('grammar', texts)
+    if results is not None:
+        return results
+    with model_manager.use('grammar') as corrector:
+        return _grammar_outputs(corrector, texts)
+
+
+def _grammar_outputs(corrector, texts: list[str]) -> list[str]:
+    results = corrector(texts, max_length=128, do_sample=False, batch_size=len(texts))
+    corrected = []
+    for text, result in zip(texts, results):
+        if isinstance(result, list):
+            result = result[0] if result else None
+        corrected.append(result['generated_text'] if result else text)
+    return corrected
+
+
+_grammar_batcher = MicroBatcher('grammar', _run_grammar)
+
+
+@inference_span('grammar')
+def correct_grammar(text: str, timeout=None) -> str:
+    return model_cache.get_or_compute('grammar', model_version('grammar'), text,
+                                      lambda item: _grammar_batcher(item, timeout))
+
+
+# ——— PRELOADING ——————————————————————————————————————————————————————————————
+WARMUP_TEXT = "This is a warm up sentence for the models."
+
+
+def warmup() -> dict[str, float]:
+    """Load every pipeline and run one input through it; return seconds per model.
+
+    Bypasses the output cache and the batcher threads so it is safe to call in
+    a server's master process before it forks workers.
+    """
+    timings = {}
+    for name, run in (('grammar', _run_grammar), ('sentiment', _run_sentiment), ('hashtags', _run_hashtags)):
+        started = time.perf_counter()
+        run([WARMUP_TEXT])
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+def preload(app):
+    # With an inference server the models live there, not in the web workers
+    if not app.config['PRELOAD_MODELS'] or _client is not None:
+        return
+    timings = warmup()
+    app.logger.info('Preloaded models: %s', ', '.join(f'{k} {v:.1f}s' for k, v in timings.items()))
+    # Move everything allocated so far out of the collector's reach, so the
+    # garbage collector does not touch (and un-share) the weights' pages in
+    # forked workers.
+    gc.collect()
+    gc.freeze()
+
+
+# ——— BACKENDS ————————————————————————————————————————————————————————————————
+OUTPUT_FUNCTIONS = {
+    'sentiment': _sentiment_outputs,
+    'hashtags': _hashtag_outputs,
+    'grammar': _grammar_outputs,
+}
+
+
+def compare_backends(name, candidates, texts, runs=3, batch_size=8):
+    """Run ``texts`` through model ``name`` on eager PyTorch and on each candidate backend.
+
+    Returns ``{backend: stats}`` with the share of outputs identical to
+    PyTorch's (``agreement``) and per-batch latency.  Loads its own
+    pipelines, so the configured ones and the output cache are untouched.
+    """
+    outputs = OUTPUT_FUNCTIONS[name]
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    report, reference = {}, None
+    for backend in ['pytorch'] + [b for b in candidates if b != 'pytorch']:
+        started = time.perf_counter()
+        pipeline_ = load_model(name, backend)
+        load_seconds = time.perf_counter() - started
+        outputs(pipeline_, batches[0])  # first call pays for lazy initialization
+
+        latencies, results = [], []
+        for run in range(runs):
+            for batch in batches:
+                started = time.perf_counter()
+                batch_results = outputs(pipeline_, batch)
+                latencies.append(time.perf_counter() - started)
+                if run == 0:
+                    results += batch_results
+        reference = reference or results
+        report[backend] = {
+            'agreement': sum(a == b for a, b in zip(results, reference)) / len(results),
+            'load_s': load_seconds,
+            'p50_ms': statistics.median(latencies) * 1000,
+            'max_ms': max(latencies) * 1000,
+            'texts_per_s': runs * len(texts) / sum(latencies),
+        }
+        del pipeline_
+        gc.collect()
+    return report
+
+
+def init_app(app):
+    global _model_dir
+    backends.configure(
+        threads=app.config['INFERENCE_THREADS'],
+        interop_threads=app.config['INFERENCE_INTEROP_THREADS'],
+        onnx_dir=app.config['ONNX_EXPORT_DIR'],
+    )
+    for name in MODEL_IDS:
+        backend = app.config['INFERENCE_BACKENDS'].get(name, app.config['INFERENCE_BACKEND'])
+        if backend not in backends.BACKENDS:
+            raise ValueError(f'Unknown inference backend {backend!r} for {name}; '
+                             f'expected one of {", ".join(backends.BACKENDS)}')
+        _backends[name] = backend
+    _model_dir = app.config['MODEL_DIR']
+    if app.config['INFERENCE_SERVER']:
+        use_server(InferenceClient(
+            app.config['INFERENCE_SERVER'],
+            timeout=app.config['INFERENCE_SERVER_TIMEOUT'],
+            pool_size=app.config['INFERENCE_SERVER_POOL_SIZE'],
+            retry_after=app.config['INFERENCE_SERVER_RETRY_AFTER'],
+            batch_size=app.config['INFERENCE_SERVER_BATCH_SIZE'],
+        ), local_fallback=app.config['INFERENCE_SERVER_LOCAL_FALLBACK'])
@@ -0,0 +1,286 @@
+"""A standalone process that owns the models, shared by every web worker.
+
+    flask models serve --address unix:///run/tweets/inference.sock
+
+Web workers set ``INFERENCE_SERVER`` to the same address and send their
+model batches there instead of loading the models themselves, so adding
+workers no longer multiplies model memory or cold starts.
+
+The protocol is a 4-byte big-endian length followed by that many bytes of
+UTF-8 JSON, in both directions, over a persistent connection:
+
+    {"model": "sentiment", "texts": ["..."]}  ->  {"results": ["POSITIVE"]}
+    {"op": "ping"}                             ->  {"results": {...stats}}
+
+Failures come back as ``{"error": "..."}``, with ``"overloaded": true``
+when the model's queue is full.
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+from app.tweets.batching import BATCHERS, InferenceOverloaded, batching_stats
+from app.tweets.model_manager import model_manager
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+class InferenceServerError(Exception):
+    """The server could not be reached or did not answer in time."""
+
+
+# ——— PROTOCOL —————————————————————————————————————————————————————————————
+def parse_address(address):
+    """``unix:///path``, a bare path, or ``tcp://host:port`` -> ``(family, address)``."""
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    return socket.AF_UNIX, address.removeprefix('unix://')
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode()
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    """Read one message; ``None`` if the peer closed the connection between messages."""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    size, = HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f'Message of {size} bytes exceeds the {MAX_MESSAGE_SIZE} byte limit')
+    data = _recv_exactly(sock, size)
+    if data is None:
+        raise ConnectionError('Connection closed mid-message')
+    return json.loads(data)
+
+
+def _recv_exactly(sock, size):
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1024 * 1024))
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ConnectionError('Connection closed mid-message')
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+# ——— SERVER ———————————————————————————————————————————————————————————————
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (OSError, ValueError) as exc:
+                logger.warning('Dropping inference client: %s', exc)
+                return
+            if request is None:
+                return
+            try:
+                response = {'results': self.server.answer(request)}
+            except InferenceOverloaded as exc:
+                response = {'error': str(exc), 'overloaded': True}
+            except Exception as exc:
+                logger.exception('Inference request failed')
+                response = {'error': f'{type(exc).__name__}: {exc}'}
+            try:
+                send_message(self.request, response)
+            except OSError as exc:
+                logger.warning('Dropping inference client: %s', exc)
+                return
+
+
+class InferenceServer:
+    """Serves model batches through this process's micro-batchers.
+
+    Every connection gets a thread; texts from all of them go into the same
+    per-model batchers, so concurrent workers also share batches.
+    """
+
+    def __init__(self, address):
+        self.address = address
+        family, bind_address = parse_address(address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(bind_address):
+                os.remove(bind_address)  # left over from a previous run
+            server_class = socketserver.ThreadingUnixStreamServer
+        else:
+            server_class = socketserver.ThreadingTCPServer
+            server_class.allow_reuse_address = True
+        server_class.daemon_threads = True
+        # The default backlog of 5 refuses bursts of new worker connections
+        server_class.request_queue_size = 128
+        self._server = server_class(bind_address, _Handler)
+        self._server.answer = self.answer
+        self.started = time.time()
+
+    def answer(self, request):
+        if request.get('op') == 'ping':
+            return {'pid': os.getpid(), 'uptime': time.time() - self.started, 'batchers': batching_stats(),
+                    'models': model_manager.stats()}
+        batcher = BATCHERS.get(request.get('model'))
+        if batcher is None:
+            raise ValueError(f"Unknown model {request.get('model')!r}")
+        futures = [batcher.submit(text) for text in request['texts']]
+        return [future.result() for future in futures]
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        family, bind_address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(bind_address):
+            os.remove(bind_address)
+
+
+# ——— CLIENT ———————————————————————————————————————————————————————————————
+class InferenceClient:
+    """Pooled connections to an ``InferenceServer``.
+
+    Connections are reused across calls, up to ``pool_size`` idle ones.
+    Texts go out ``batch_size`` at a time, so ``timeout`` bounds one
+    request of that size however many texts a caller passes.  A failed
+    call raises ``InferenceServerError``.  When the server cannot be
+    reached, it is then skipped for ``retry_after`` seconds, so callers do
+    not wait for a connection on every request.  A timeout only fails its
+    own request: the server is up, just busy.
+    """
+
+    def __init__(self, address, timeout=30.0, pool_size=8, retry_after=30.0, batch_size=32):
+        self.address = address
+        self.family, self.sock_address = parse_address(address)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retry_after = retry_after
+        self.batch_size = batch_size
+        self._pool = queue.LifoQueue()
+        self._pid = os.getpid()
+        self._down_until = 0.0
+        self._stats_lock = threading.Lock()
+        self._stats = {'calls': 0, 'failures': 0, 'timeouts': 0, 'skipped': 0, 'connects': 0}
+
+    def run(self, model, texts):
+        results = []
+        for start in range(0, len(texts), self.batch_size):
+            results += self._call({'model': model, 'texts': texts[start:start + self.batch_size]})
+        return results
+
+    def ping(self):
+        return self._call({'op': 'ping'})
+
+    def available(self):
+        return time.monotonic() >= self._down_until
+
+    def _call(self, request):
+        if not self.available():
+            self._count('skipped')
+            raise InferenceServerError(f'{self.address} failed recently; retrying after a pause')
+        self._count('calls')
+        sock, pooled = self._acquire()
+        try:
+            response = self._exchange(sock, request)
+        except TimeoutError as exc:
+            # The server is slow, not gone: resending would run the batch twice,
+            # and skipping it would push every caller onto its fallback
+            sock.close()
+            self._count('timeouts')
+            raise InferenceServerError(f'{self.address}: {exc}') from exc
+        except (OSError, ValueError) as exc:
+            sock.close()
+            # Only a connection that died while idle is worth a retry
+            if not pooled or not isinstance(exc, ConnectionError):
+                self._fail()
+                raise InferenceServerError(f'{self.address}: {exc}') from exc
+            # An idle connection may predate a server restart; retry once on a new one
+            self._close_idle()
+            sock, _ = self._acquire(fresh=True)
+            try:
+                response = self._exchange(sock, request)
+            except TimeoutError as exc:
+                sock.close()
+                self._count('timeouts')
+                raise InferenceServerError(f'{self.address}: {exc}') from exc
+            except (OSError, ValueError) as exc:
+                sock.close()
+                self._fail()
+                raise InferenceServerError(f'{self.address}: {exc}') from exc
+        self._release(sock)
+        if response.get('overloaded'):
+            raise InferenceOverloaded(response['error'])
+        if 'error' in response:
+            raise InferenceServerError(response['error'])
+        return response['results']
+
+    @staticmethod
+    def _exchange(sock, request):
+        send_message(sock, request)
+        response = recv_message(sock)
+        if response is None:
+            raise ConnectionError('Server closed the connection')
+        return response
+
+    def _fail(self):
+        self._count('failures')
+        self._down_until = time.monotonic() + self.retry_after
+        self._close_idle()
+
+    def _close_idle(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self, fresh=False):
+        """A connection and whether it was reused from the pool."""
+        if self._pid != os.getpid():
+            # Sockets inherited through fork() are shared with the parent
+            self._pool = queue.LifoQueue()
+            self._pid = os.getpid()
+        if not fresh:
+            try:
+                return self._pool.get_nowait(), True
+            except queue.Empty:
+                pass
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.sock_address)
+        except OSError as exc:
+            sock.close()
+            self._fail()
+            raise InferenceServerError(f'Cannot connect to {self.address}: {exc}') from exc
+        self._count('connects')
+        return sock, False
+
+    def _release(self, sock):
+        if self._pool.qsize() < self.pool_size:
+            self._pool.put(sock)
+        else:
+            sock.close()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update(idle_connections=self._pool.qsize(), available=int(self.available()))
+        return stats
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from app.cache import LRUCache
+
+
+def normalize_text(text):
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def cache_key(model_id, text):
+    return hashlib.sha256(f'{model_id}\0{normalize_text(text)}'.encode()).hexdigest()
+
+
+class ModelOutputCache:
+    """Two-tier cache of model outputs keyed by model ID + normalized text.
+
+    Lookups hit a bounded in-process LRU first, then a SQLite file that
+    survives restarts and is shared by every process on the host.  Rows
+    written under a different model ID for the same task are dropped on
+    startup, so swapping a model never serves its predecessor's answers.
+    """
+
+    def __init__(self, maxsize=10000, path=None):
+        self.disk_hits = 0
+        self.disk_writes = 0
+        self.configure(maxsize, path)
+
+    def configure(self, maxsize, path):
+        self.memory = LRUCache(maxsize)
+        self.path = path
+        self._local = threading.local()
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with self._connection() as connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS model_output ('
+                    'task TEXT NOT NULL, key TEXT NOT NULL, model_id TEXT NOT NULL, '
+                    'value TEXT NOT NULL, created_at REAL NOT NULL, PRIMARY KEY (task, key))'
+                )
+
+    def _connection(self):
+        # sqlite3 connections must not be shared across threads or fork()
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def invalidate_stale(self, task, model_id):
+        """Drop persisted outputs of ``task`` produced by any other model."""
+        self.memory.clear()
+        if not self.path:
+            return 0
+        with self._connection() as connection:
+            cursor = connection.execute(
+                'DELETE FROM model_output WHERE task = ? AND model_id != ?', (task, model_id)
+            )
+        return cursor.rowcount
+
+    def get(self, task, model_id, text):
+        key = cache_key(model_id, text)
+        value = self.memory.get((task, key))
+        if value is not None or not self.path:
+            return value
+        row = self._connection().execute(
+            'SELECT value FROM model_output WHERE task = ? AND key = ?', (task, key)
+        ).fetchone()
+        if row is None:
+            return None
+        self.disk_hits += 1
+        value = json.loads(row[0])
+        self.memory.set((task, key), value)
+        return value
+
+    def set(self, task, model_id, text, value):
+        key = cache_key(model_id, text)
+        self.memory.set((task, key), value)
+        if self.path:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO model_output (task, key, model_id, value, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (task, key, model_id, json.dumps(value), time.time())
+            )
+            self.disk_writes += 1
+
+    def get_or_compute(self, task, model_id, text, compute):
+        value = self.get(task, model_id, text)
+        if value is None:
+            value = compute(text)
+            self.set(task, model_id, text, value)
+        return value
+
+    def get_or_compute_many(self, task, model_id, texts, compute_batch):
+        """Like ``get_or_compute`` for a list; only the misses reach ``compute_batch``."""
+        results = [self.get(task, model_id, text) for text in texts]
+        missing = {}  # one model run per distinct normalized text
+        for i, value in enumerate(results):
+            if value is None:
+                missing.setdefault(cache_key(model_id, texts[i]), []).append(i)
+        if missing:
+            indexes = list(missing.values())
+            computed = compute_batch([texts[group[0]] for group in indexes])
+            for group, value in zip(indexes, computed):
+                self.set(task, model_id, texts[group[0]], value)
+                for i in group:
+                    results[i] = value
+        return results
+
+    def stats(self):
+        memory = self.memory.stats()
+        lookups = memory['hits'] + memory['misses']
+        hits = memory['hits'] + self.disk_hits
+        return {
+            'size': memory['size'],
+            'maxsize': memory['maxsize'],
+            'memory_hits': memory['hits'],
+            'disk_hits': self.disk_hits,
+            'misses': lookups - hits,
+            'evictions': memory['evictions'],
+            'disk_writes': self.disk_writes,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'persistent': bool(self.path),
+        }
+
+
+model_cache = ModelOutputCache()
+
+
+def init_app(app):
+    from app.tweets.inference import MODEL_IDS, model_version
+
+    model_cache.configure(app.config['MODEL_CACHE_SIZE'], app.config['MODEL_CACHE_PATH'])
+    for task in MODEL_IDS:
+        model_cache.invalidate_stale(task, model_version(task))
@@ -0,0 +1,201 @@
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.instrumentation import MODEL_EVENTS, MODEL_LOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _rss_bytes():
+    # Linux only; elsewhere sizes come from the model's tensors alone
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _tensor_bytes(pipeline_):
+    model = getattr(pipeline_, 'model', None)
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except (AttributeError, TypeError):  # ONNX Runtime models keep their weights outside Python
+        return 0
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class LoadedModel:
+    def __init__(self, pipeline_, resident_bytes):
+        self.pipeline = pipeline_
+        self.resident_bytes = resident_bytes
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+
+class ModelManager:
+    """Loads the model pipelines on demand and keeps their memory in check.
+
+    Each model's resident size is the larger of its tensor sizes and the
+    process's RSS growth while it loaded.  Loading a model that takes the
+    total past ``budget_bytes`` unloads the least recently used models not
+    running a batch; models unused for ``idle_seconds`` are unloaded by a
+    background timer.  An unloaded model is loaded again on its next use.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = OrderedDict()  # least recently used first
+        self._lock = threading.RLock()
+        # Loads run one at a time, so each RSS delta belongs to one model
+        self._load_lock = threading.Lock()
+        self._counts = {}
+        self.budget_bytes = 0  # 0 = unbounded
+        self.idle_seconds = 0  # 0 = never unload idle models
+        self._pid = None
+        self._stop = threading.Event()
+
+    def register(self, name, loader):
+        self._loaders[name] = loader
+        self._counts[name] = {'loads': 0, 'unloads': 0}
+
+    def configure(self, budget_bytes=0, idle_seconds=0):
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self._enforce_budget()
+
+    def get(self, name):
+        """The pipeline of ``name``, loading it if needed."""
+        with self.use(name) as pipeline_:
+            return pipeline_
+
+    @contextmanager
+    def use(self, name):
+        """The pipeline of ``name``, protected from eviction for the ``with`` block."""
+        model = self._acquire(name)
+        try:
+            yield model.pipeline
+        finally:
+            with self._lock:
+                model.in_use -= 1
+                model.last_used = time.monotonic()
+
+    def _acquire(self, name):
+        self._ensure_timer()
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                self._models.move_to_end(name)
+                model.in_use += 1
+                return model
+        # Loaded models stay usable while another one loads
+        with self._load_lock:
+            with self._lock:
+                model = self._models.get(name)
+                if model is not None:
+                    model.in_use += 1
+                    return model
+            model = self._load(name)
+            with self._lock:
+                model.in_use += 1
+                self._models[name] = model
+        self._enforce_budget(keep=name)
+        return model
+
+    def _load(self, name):
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        pipeline_ = self._loaders[name]()
+        elapsed = time.perf_counter() - started
+        resident = max(_tensor_bytes(pipeline_), _rss_bytes() - rss_before)
+        self._counts[name]['loads'] += 1
+        MODEL_EVENTS.inc(model=name, event='load')
+        MODEL_LOAD_SECONDS.observe(elapsed, model=name)
+        logger.info('Loaded %s in %.1fs (%.0f MB resident)', name, elapsed, resident / 2 ** 20)
+        return LoadedModel(pipeline_, resident)
+
+    def unload(self, name, reason='manual'):
+        with self._lock:
+            model = self._models.pop(name, None)
+        if model is None:
+            return False
+        del model
+        gc.collect()
+        self._counts[name]['unloads'] += 1
+        MODEL_EVENTS.inc(model=name, event=f'unload_{reason}')
+        logger.info('Unloaded %s (%s)', name, reason)
+        return True
+
+    def unload_all(self):
+        for name in list(self._models):
+            self.unload(name)
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(model.resident_bytes for model in self._models.values())
+
+    def _enforce_budget(self, keep=None):
+        if not self.budget_bytes:
+            return
+        while True:
+            with self._lock:
+                if self.resident_bytes() <= self.budget_bytes:
+                    return
+                victim = next((name for name, model in self._models.items()
+                               if name != keep and not model.in_use), None)
+            if victim is None:
+                logger.warning('Models need %.0f MB, over the %.0f MB budget, and none can be unloaded',
+                               self.resident_bytes() / 2 ** 20, self.budget_bytes / 2 ** 20)
+                return
+            self.unload(victim, 'budget')
+
+    def unload_idle(self):
+        if not self.idle_seconds:
+            return 0
+        horizon = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [name for name, model in self._models.items() if not model.in_use and model.last_used < horizon]
+        return sum(self.unload(name, 'idle') for name in idle)
+
+    def _ensure_timer(self):
+        if self._pid == os.getpid() or not self.idle_seconds:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run_timer, name='model-unloader', daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run_timer(self):
+        while not self._stop.wait(min(self.idle_seconds / 2, 60)):
+            self.unload_idle()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            stats = {}
+            for name, counts in self._counts.items():
+                model = self._models.get(name)
+                stats[name] = dict(
+                    counts,
+                    loaded=int(model is not None),
+                    resident_bytes=model.resident_bytes if model else 0,
+                    idle_seconds=now - model.last_used if model and not model.in_use else 0.0,
+                    in_use=model.in_use if model else 0,
+                )
+            return stats
+
+
+model_manager = ModelManager()
+
+
+def init_app(app):
+    model_manager.configure(
+        budget_bytes=int(app.config['MODEL_MEMORY_BUDGET_MB'] * 2 ** 20),
+        idle_seconds=app.config['MODEL_IDLE_UNLOAD_SECONDS'],
+    )
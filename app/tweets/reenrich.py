@@ -0,0 +1,171 @@
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import and_, bindparam, delete, insert, or_, select, update
+
+from app.extensions import db
+from app.hashtags import get_or_create_hashtag_ids, parse_hashtags
+from app.models import Tweet, TweetHashtag
+from app.tweets.importer import load_checkpoint, save_checkpoint
+from app.tweets.inference import analyze_sentiment_batch, generate_hashtags_batch
+
+# Stages that can be recomputed from the stored text; grammar correction
+# already rewrote it, so running it again would only correct the correction.
+MODELS = ('sentiment', 'hashtags')
+
+
+def reenrich_texts(texts, models):
+    """Model outputs for ``texts``; module-level so a process pool can pickle it."""
+    results = {}
+    if 'sentiment' in models:
+        results['sentiment'] = analyze_sentiment_batch(texts)
+    if 'hashtags' in models:
+        results['hashtags'] = generate_hashtags_batch(texts)
+    return results
+
+
+def _remaining_path(path, models):
+    # Drop the re-run stages from a 'fallback:<stages>' path
+    if not path or not path.startswith('fallback:'):
+        return path
+    stages = [stage for stage in path[len('fallback:'):].split(',') if stage not in models]
+    return f"fallback:{','.join(stages)}" if stages else 'models'
+
+
+class Reenricher:
+    """Recompute model outputs of stored tweets, e.g. after swapping a model.
+
+    Tweets are streamed in primary-key order over a separate connection
+    with ``yield_per`` (a server-side cursor where the database has them),
+    run through the batched model calls (in a process pool when
+    ``processes`` > 0) and written back with one executemany UPDATE per
+    batch, committed together with a checkpoint of the last tweet ID.
+    Memory stays bounded by the batch size, not the table size.
+
+    An update only applies if the tweet's content is unchanged since it
+    was read, so tweets edited meanwhile keep their own enrichment job's
+    results.
+    """
+
+    def __init__(self, models=MODELS, batch_size=256, processes=0, since=None, degraded=False):
+        self.models = tuple(models)
+        self.batch_size = batch_size
+        self.processes = processes
+        self.since = since
+        self.degraded = degraded
+
+    def options(self):
+        """What the checkpoint was taken with; resuming with other options is refused."""
+        return {
+            'models': sorted(self.models),
+            'since': self.since.isoformat() if self.since else None,
+            'degraded': self.degraded,
+        }
+
+    def run(self, checkpoint_path=None, progress=None):
+        state = {'last_id': 0, 'processed': 0, 'updated': 0, 'options': self.options()}
+        if checkpoint_path:
+            state = load_checkpoint(checkpoint_path, state)
+            if state.get('options') != self.options():
+                raise ValueError(f"{checkpoint_path} was written with {state.get('options')}; "
+                                 f"resume with the same options")
+        started = time.perf_counter()
+        processed_now = 0
+
+        pool = ProcessPoolExecutor(self.processes) if self.processes > 0 else None
+        try:
+            for rows, results in self._pipeline(self._stream(state['last_id']), pool):
+                updated = self.write(rows, results.result() if pool is not None else results)
+                db.session.commit()
+
+                processed_now += len(rows)
+                state['last_id'] = rows[-1].id
+                state['processed'] += len(rows)
+                state['updated'] += updated
+                if checkpoint_path:
+                    save_checkpoint(checkpoint_path, state)
+                if progress:
+                    progress(state, processed_now / (time.perf_counter() - started))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        elapsed = time.perf_counter() - started
+        return dict(state, seconds=elapsed, rows_per_sec=processed_now / elapsed if elapsed else 0.0)
+
+    def _stream(self, after_id):
+        conditions = [Tweet.id > after_id, Tweet.enrichment_status == 'done']
+        if self.since:
+            conditions.append(Tweet.created_at >= self.since)
+        if self.degraded:
+            # Only fallbacks this run can redo; a grammar fallback stays, as the
+            # text before correction is not stored
+            conditions.append(or_(*(Tweet.enrichment_path.like(f'fallback:%{model}%') for model in self.models)))
+        statement = select(Tweet.id, Tweet.content, Tweet.enrichment_path) \
+            .where(and_(*conditions)).order_by(Tweet.id)
+        # A connection of its own, so commits of the updates do not close the cursor
+        with db.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=self.batch_size) \
+                .execute(statement)
+            for rows in result.partitions():
+                yield rows
+
+    def _pipeline(self, batches, pool):
+        # Keep a small window of batches in the models ahead of the one being written
+        window = deque()
+        depth = 2 * self.processes if pool is not None else 1
+        for rows in batches:
+            texts = [row.content for row in rows]
+            results = pool.submit(reenrich_texts, texts, self.models) if pool is not None \
+                else reenrich_texts(texts, self.models)
+            window.append((rows, results))
+            if len(window) >= depth:
+                yield window.popleft()
+        yield from window
+
+    def write(self, rows, results):
+        """Write one batch of model outputs back; returns how many tweets were updated."""
+        params = []
+        for i, row in enumerate(rows):
+            # Bind names must differ from the column names in an UPDATE
+            values = {'tweet_id': row.id, 'old_content': row.content,
+                      'new_path': _remaining_path(row.enrichment_path, self.models)}
+            if 'sentiment' in results:
+                values['new_sentiment'] = results['sentiment'][i]
+            if 'hashtags' in results:
+                values['tags'] = parse_hashtags(' '.join(results['hashtags'][i]))
+                values['new_hashtags'] = ' '.join(f"#{tag}" for tag in values['tags'])
+            params.append(values)
+
+        table = Tweet.__table__
+        new_values = {'enrichment_path': bindparam('new_path')}
+        if 'sentiment' in results:
+            new_values['sentiment'] = bindparam('new_sentiment')
+        if 'hashtags' in results:
+            new_values['hashtags'] = bindparam('new_hashtags')
+        statement = update(table) \
+            .where(table.c.id == bindparam('tweet_id'), table.c.content == bindparam('old_content')) \
+            .values(new_values)
+        updated = db.session.execute(statement, params).rowcount
+
+        if 'hashtags' in results:
+            self._relink(params)
+        return updated
+
+    def _relink(self, params):
+        by_id = {p['tweet_id']: p for p in params}
+        # Tweets edited since they were read kept their hashtags; leave their links alone
+        params = [
+            by_id[tweet_id] for tweet_id, content in db.session.execute(
+                select(Tweet.id, Tweet.content).where(Tweet.id.in_(list(by_id)))
+            )
+            if content == by_id[tweet_id]['old_content']
+        ]
+        if not params:
+            return
+        db.session.execute(delete(TweetHashtag).where(TweetHashtag.tweet_id.in_([p['tweet_id'] for p in params])))
+        hashtag_ids = get_or_create_hashtag_ids(sorted({tag for p in params for tag in p['tags']}))
+        links = [{'tweet_id': p['tweet_id'], 'hashtag_id': hashtag_ids[tag]} for p in params for tag in p['tags']]
+        if links:
+            db.session.execute(insert(TweetHashtag.__table__), links)
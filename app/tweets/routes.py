@@ -1,24 +1,26 @@
 from datetime import datetime
-import os
 
-import torch
-from PIL import Image
 from flask import (
     render_template, redirect, url_for, request,
-    flash, abort, current_app
+    flash, abort, current_app, jsonify
 )
 from flask_login import login_required, current_user
+from sqlalchemy import delete
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileAllowed
-from werkzeug.utils import secure_filename
 from wtforms import TextAreaField, FileField, SubmitField
 from wtforms.validators import DataRequired, Length
 
+from app.database import insert_ignore
 from app.extensions import db
+from app.fragments import fragment_cache
 from app.models import Tweet, Comment, Like
 from app.tweets import tweets_bp
-
-from transformers import pipeline
+from app.loading import get_tweet_or_404, get_comments
+from app.tweets.enrichment import enqueue_enrichment, enrichment_worker
+from app.tweets.images import process_upload, release_image
+from app.tweets.batching import batching_stats
+from app.tweets.model_cache import model_cache
 
 
 # ——— FORMS ———————————————————————————————————————————————————————————————
@@ -40,108 +42,30 @@ def allowed_file(filename):
 
 def save_uploaded_file(file):
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filename = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}_{filename}"
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        return filepath
+        return process_upload(file)
     return None
 
 
-# ——— SENTIMENT ANALYSIS ———————————————————————————————————————————————————————
-_sentiment_pipeline = None
-
-
-def get_sentiment_pipeline():
-    global _sentiment_pipeline
-    if _sentiment_pipeline is None:
-        _sentiment_pipeline = pipeline(
-            "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english"
-        )
-    return _sentiment_pipeline
-
-
-def analyze_sentiment(text: str) -> str:
-    pipeline_ = get_sentiment_pipeline()
-    text = text[:512]
-    result = pipeline_(text)
-    if result and isinstance(result, list) and 'label' in result[0]:
-        return result[0]['label']
-    return "NEUTRAL"
-
-
-# ——— HASHTAG GENERATION ———————————————————————————————————————————————————————
-_hashtag_generator = None
-
-
-def get_hashtag_generator():
-    global _hashtag_generator
-    if _hashtag_generator is None:
-        _hashtag_generator = pipeline('text2text-generation', model='t5-small')
-    return _hashtag_generator
-
-
-def generate_hashtags_hf(text: str, max_tags=5) -> list[str]:
-    generator = get_hashtag_generator()
-    prompt = f"generate hashtags: {text}"
-    results = generator(prompt, max_length=50, num_return_sequences=1)
-    hashtags_text = results[0]['generated_text']
-    tags = hashtags_text.replace('#', '').replace(',', ' ').split()
-    unique_tags = []
-    for tag in tags:
-        tag = tag.lower()
-        if tag.isalpha() and tag not in unique_tags:
-            unique_tags.append(tag)
-        if len(unique_tags) >= max_tags:
-            break
-    return [f"#{tag}" for tag in unique_tags]
-
-
-# ——— GRAMMAR CORRECTION ——————————————————————————————————————————————————————
-_grammar_corrector = None
-
-
-def get_grammar_corrector():
-    global _grammar_corrector
-    if _grammar_corrector is None:
-        _grammar_corrector = pipeline(
-            "text2text-generation",
-            model="AventIQ-AI/T5-small-grammar-correction"
-        )
-    return _grammar_corrector
-
-
-def correct_grammar(text: str) -> str:
-    corrector = get_grammar_corrector()
-    result = corrector(text, max_length=128, do_sample=False)
-    if result and isinstance(result, list):
-        return result[0]['generated_text']
-    return text
-
-
 # ——— ROUTES ————————————————————————————————————————————————————————————————
 @tweets_bp.route('/tweet/new', methods=['GET', 'POST'])
 @login_required
 def new_tweet():
     form = TweetForm()
     if form.validate_on_submit():
-        image_path = save_uploaded_file(form.image.data) if form.image.data else None
-        corrected_text = correct_grammar(form.content.data)
-        sentiment = analyze_sentiment(corrected_text)
-        hashtags_list = generate_hashtags_hf(corrected_text)
-        hashtags = " ".join(hashtags_list)
+        image = save_uploaded_file(form.image.data) if form.image.data else None
 
+        # Grammar, sentiment and hashtags are filled in by the enrichment worker
         tweet = Tweet(
-            content=corrected_text,
+            content=form.content.data,
             user_id=current_user.id,
-            image=os.path.basename(image_path) if image_path else None,
-            sentiment=sentiment,
-            hashtags=hashtags,
+            image=image,
+            hashtags='',
         )
+        enqueue_enrichment(tweet)
         db.session.add(tweet)
         db.session.commit()
-        flash(f'Tweet created! Corrected text: "{corrected_text}" | Sentiment: {sentiment}', 'success')
+        enrichment_worker.notify()
+        flash('Tweet created! Grammar, mood and hashtags will appear shortly.', 'success')
         return redirect(url_for('main.home'))
     return render_template('create_tweet.html', form=form)
 
@@ -149,7 +73,7 @@ def new_tweet():
 @tweets_bp.route('/tweet/<int:tweet_id>', methods=['GET', 'POST'])
 @login_required
 def view_tweet(tweet_id):
-    tweet = Tweet.query.get_or_404(tweet_id)
+    tweet = get_tweet_or_404(tweet_id)
     form = CommentForm()
     if form.validate_on_submit():
         comment = Comment(
@@ -158,10 +82,12 @@ def view_tweet(tweet_id):
             user_id=current_user.id
         )
         db.session.add(comment)
+        tweet.comment_count = Tweet.comment_count + 1
         db.session.commit()
+        fragment_cache.invalidate(tweet.id)
         flash('Comment added!', 'success')
         return redirect(url_for('tweets.view_tweet', tweet_id=tweet.id))
-    return render_template('view_tweet.html', tweet=tweet, form=form)
+    return render_template('view_tweet.html', tweet=tweet, comments=get_comments(tweet), form=form)
 
 
 @tweets_bp.route('/tweet/<int:tweet_id>/edit', methods=['GET', 'POST'])
@@ -173,25 +99,18 @@ def edit_tweet(tweet_id):
     form = TweetForm()
 
     if form.validate_on_submit():
-        corrected_text = correct_grammar(form.content.data)
-        tweet.content = corrected_text
-        tweet.sentiment = analyze_sentiment(corrected_text)
-        hashtags_list = generate_hashtags_hf(corrected_text)
-        tweet.hashtags = " ".join(hashtags_list)
+        tweet.content = form.content.data
+        enqueue_enrichment(tweet)
 
         if form.image.data:
-            if tweet.image:
-                try:
-                    os.remove(os.path.join(current_app.config['UPLOAD_FOLDER'], tweet.image))
-                except OSError:
-                    pass
-            image_path = save_uploaded_file(form.image.data)
-            if image_path:
-                tweet.image = os.path.basename(image_path)
-            else:
-                tweet.image = None
+            old_image = tweet.image
+            tweet.image = save_uploaded_file(form.image.data)
+            if old_image != tweet.image:
+                release_image(old_image, tweet.id)
 
         db.session.commit()
+        fragment_cache.invalidate(tweet.id)
+        enrichment_worker.notify()
         flash('Tweet updated!', 'success')
         return redirect(url_for('tweets.view_tweet', tweet_id=tweet.id))
 
@@ -207,8 +126,10 @@ def delete_comment(comment_id):
     comment = Comment.query.get_or_404(comment_id)
     if comment.user_id != current_user.id and comment.tweet.author != current_user:
         abort(403)
+    comment.tweet.comment_count = Tweet.comment_count - 1
     db.session.delete(comment)
     db.session.commit()
+    fragment_cache.invalidate(comment.tweet_id)
     flash('Comment deleted!', 'success')
     return redirect(url_for('tweets.view_tweet', tweet_id=comment.tweet_id))
 
@@ -216,17 +137,32 @@ def delete_comment(comment_id):
 @tweets_bp.route('/tweet/<int:tweet_id>/like', methods=['POST'])
 @login_required
 def like_tweet(tweet_id):
-    tweet = Tweet.query.get_or_404(tweet_id)
+    # The row lock (which the counter update takes anyway) serializes toggles
+    # of this tweet until the commit, so two never interleave.  SQLite ignores
+    # FOR UPDATE; its writes are serialized by the database lock instead.
+    tweet = Tweet.query.filter_by(id=tweet_id).with_for_update().first_or_404()
     if tweet.user_id == current_user.id:
         abort(403)
-    existing = Like.query.filter_by(user_id=current_user.id, tweet_id=tweet.id).first()
-    if existing:
-        db.session.delete(existing)
+    # Toggle without a read: try to remove the like, and only if there was
+    # none insert it. The unique (user_id, tweet_id) index makes a concurrent
+    # double click a no-op instead of a duplicate row.
+    removed = db.session.execute(
+        delete(Like)
+        .where(Like.user_id == current_user.id, Like.tweet_id == tweet.id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if removed:
+        delta = -removed
         flash('Like removed', 'info')
     else:
-        db.session.add(Like(user_id=current_user.id, tweet_id=tweet.id))
+        delta = db.session.execute(
+            insert_ignore(Like).values(user_id=current_user.id, tweet_id=tweet.id, created_at=datetime.utcnow())
+        ).rowcount
         flash('Like added!', 'success')
+    if delta:
+        tweet.like_count = Tweet.like_count + delta
     db.session.commit()
+    fragment_cache.invalidate(tweet.id)
     return redirect(request.referrer or url_for('main.home'))
 
 
@@ -236,12 +172,31 @@ def delete_tweet(tweet_id):
     tweet = Tweet.query.get_or_404(tweet_id)
     if tweet.author != current_user:
         abort(403)
-    if tweet.image:
-        try:
-            os.remove(os.path.join(current_app.config['UPLOAD_FOLDER'], tweet.image))
-        except OSError:
-            pass
+    release_image(tweet.image, tweet.id)
     db.session.delete(tweet)
     db.session.commit()
+    fragment_cache.invalidate(tweet_id)
     flash('Tweet deleted!', 'success')
     return redirect(url_for('main.profile'))
+
+
+@tweets_bp.route('/tweet/<int:tweet_id>/enrichment')
+@login_required
+def enrichment_status(tweet_id):
+    tweet = Tweet.query.get_or_404(tweet_id)
+    job = tweet.enrichment_job
+    return jsonify(
+        status=tweet.enrichment_status,
+        path=tweet.enrichment_path,
+        attempts=job.attempts if job else None,
+        last_error=job.last_error if job else None,
+        content=tweet.content,
+        sentiment=tweet.sentiment,
+        hashtags=tweet.hashtags.split() if tweet.hashtags else [],
+    )
+
+
+@tweets_bp.route('/inference/stats')
+@login_required
+def inference_stats():
+    return jsonify(batching=batching_stats(), cache=model_cache.stats())
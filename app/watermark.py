@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignore
+from app.models import Tweet, Like, Comment, TweetHashtag, Watermark
+
+TIMELINE = 'timeline'
+
+# Writes to these tables can change what the timeline shows
+TIMELINE_TABLES = frozenset(model.__table__ for model in (Tweet, Like, Comment, TweetHashtag))
+
+
+def read_watermark(session, name=TIMELINE):
+    """Return ``(version, updated_at)`` with a single primary-key lookup."""
+    row = session.execute(
+        select(Watermark.version, Watermark.updated_at).where(Watermark.name == name)
+    ).first()
+    return tuple(row) if row is not None else (0, None)
+
+
+def bump_watermark(session, name=TIMELINE):
+    now = datetime.utcnow().replace(microsecond=0)
+    result = session.execute(
+        update(Watermark)
+        .where(Watermark.name == name)
+        .values(version=Watermark.version + 1, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        session.execute(insert_ignore(Watermark).values(name=name, version=1, updated_at=now))
+
+
+# The watermark moves with every transaction that wrote to a timeline
+# table, whether through the unit of work or a bulk statement, and commits
+# together with it.  All such writers update the same row.
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session, flush_context):
+    if any(obj.__table__ in TIMELINE_TABLES
+           for obj in (*session.new, *session.dirty, *session.deleted)
+           if hasattr(obj, '__table__')):
+        session.info['timeline_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        if getattr(orm_execute_state.statement, 'table', None) in TIMELINE_TABLES:
+            orm_execute_state.session.info['timeline_changed'] = True
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_on_commit(session):
+    session.flush()
+    if session.info.pop('timeline_changed', False):
+        bump_watermark(session)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _reset(session, transaction):
+    if transaction.parent is None:  # not when a savepoint ends
+        session.info.pop('timeline_changed', None)
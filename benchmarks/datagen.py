@@ -0,0 +1,143 @@
+"""Seeded synthetic data with the skew of a real timeline.
+
+A few users write most tweets, a few tweets get most likes and comments,
+and word and hashtag frequencies follow Zipf's law.  The same seed and
+sizes always produce the same rows.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.datagen --tweets 20000
+"""
+import argparse
+import itertools
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update, func, select
+
+from app.extensions import db
+from app.hashtags import get_or_create_hashtag_ids
+from app.models import User, Tweet, Like, Comment, TweetHashtag
+from app.tweets.importer import chunked
+
+PASSWORD = 'benchmark'
+CHUNK_SIZE = 1000
+
+WORDS = (
+    'the a to of and in is it you that for on was with be this have are not but at from they we his '
+    'just day love good time great new today people work really life think night know happy game '
+    'music news world best back home week morning friends weekend coffee city summer team season '
+    'movie book photo travel food weather rain sunny football launch update release community'
+).split()
+TAGS = (
+    'news sports music tech python travel food art photography gaming movies science health '
+    'fitness fashion books nature coding startup design ai climate history football weekend'
+).split()
+
+
+def zipf_weights(n, s=1.1):
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def dataset_sizes(tweets):
+    """Default users/likes/comments for a given tweet count."""
+    return {'users': max(10, tweets // 20), 'tweets': tweets, 'likes': tweets * 3, 'comments': tweets}
+
+
+def generate(users, tweets, likes, comments, seed=42, days=90):
+    """Fill the current app's (empty) database; return the row counts."""
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1)
+
+    # Every user shares one password hash; hashing per user would dominate setup
+    template = User(username='template')
+    template.set_password(PASSWORD)
+    db.session.execute(insert(User.__table__), [
+        {'id': i, 'username': f'user{i:06d}', 'email': f'user{i}@example.com',
+         'password_hash': template.password_hash}
+        for i in range(1, users + 1)
+    ])
+
+    # Authors and popular tweets are drawn by Zipf rank over a shuffled order
+    author_order = rng.sample(range(1, users + 1), users)
+    author_weights = zipf_weights(users)
+    word_weights = zipf_weights(len(WORDS))
+    tag_weights = zipf_weights(len(TAGS))
+
+    tweet_tags = {}
+    for chunk in chunked(range(1, tweets + 1), CHUNK_SIZE):
+        rows = []
+        for tweet_id in chunk:
+            words = rng.choices(WORDS, cum_weights=word_weights, k=rng.randint(4, 30))
+            tags = sorted(set(rng.choices(TAGS, cum_weights=tag_weights, k=rng.choice((0, 1, 1, 2, 3)))))
+            tweet_tags[tweet_id] = tags
+            content = (' '.join(words) + ''.join(f' #{tag}' for tag in tags))[:280]
+            rows.append({
+                'id': tweet_id,
+                'user_id': rng.choices(author_order, cum_weights=author_weights)[0],
+                'content': content,
+                'sentiment': rng.choice(('POSITIVE', 'NEGATIVE')),
+                'hashtags': ' '.join(f'#{tag}' for tag in tags),
+                'enrichment_status': 'done',
+                'created_at': now - timedelta(seconds=rng.randrange(days * 86400)),
+            })
+        db.session.execute(insert(Tweet.__table__), rows)
+
+    hashtag_ids = get_or_create_hashtag_ids(sorted(TAGS))
+    links = ({'tweet_id': t, 'hashtag_id': hashtag_ids[tag]} for t, tags in tweet_tags.items() for tag in tags)
+    for chunk in chunked(links, CHUNK_SIZE):
+        db.session.execute(insert(TweetHashtag.__table__), chunk)
+
+    tweet_order = rng.sample(range(1, tweets + 1), tweets)
+    tweet_weights = zipf_weights(tweets, s=0.9)
+
+    seen = set()
+    like_rows = []
+    for _ in range(likes):
+        pair = (rng.randint(1, users), rng.choices(tweet_order, cum_weights=tweet_weights)[0])
+        if pair not in seen:
+            seen.add(pair)
+            like_rows.append({'user_id': pair[0], 'tweet_id': pair[1], 'created_at': now})
+    for chunk in chunked(like_rows, CHUNK_SIZE):
+        db.session.execute(insert(Like.__table__), chunk)
+
+    comment_rows = (
+        {'user_id': rng.randint(1, users), 'tweet_id': rng.choices(tweet_order, cum_weights=tweet_weights)[0],
+         'content': ' '.join(rng.choices(WORDS, cum_weights=word_weights, k=rng.randint(2, 15))),
+         'created_at': now}
+        for _ in range(comments)
+    )
+    for chunk in chunked(comment_rows, CHUNK_SIZE):
+        db.session.execute(insert(Comment.__table__), chunk)
+
+    like_counts = select(func.count(Like.id)).where(Like.tweet_id == Tweet.id).scalar_subquery()
+    comment_counts = select(func.count(Comment.id)).where(Comment.tweet_id == Tweet.id).scalar_subquery()
+    db.session.execute(
+        update(Tweet).values(like_count=like_counts, comment_count=comment_counts)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return {'users': users, 'tweets': tweets, 'likes': len(like_rows), 'comments': comments}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill the database with synthetic tweets.')
+    parser.add_argument('--tweets', type=int, default=10000)
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--likes', type=int)
+    parser.add_argument('--comments', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from app import create_app
+
+    sizes = dataset_sizes(args.tweets)
+    sizes.update({k: getattr(args, k) for k in ('users', 'likes', 'comments') if getattr(args, k) is not None})
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if db.session.execute(select(Tweet.id).limit(1)).first() is not None:
+            parser.error('the database already has tweets; point DATABASE_URL at an empty one')
+        print(generate(seed=args.seed, **sizes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""Request-level benchmarks of the main views on synthetic data.
+
+    python -m benchmarks.run --sizes 1000,10000 --requests 200 --output bench.json
+
+For every data size a fresh SQLite database is generated with
+``benchmarks.datagen`` and each scenario drives the Flask test client as a
+logged-in user, with the stub models from ``benchmarks.stub_models``.  The
+JSON report (latency percentiles, SQL statements per request, throughput)
+is stable across runs of the same commit, so two reports can be diffed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+
+from benchmarks import stub_models
+from benchmarks.datagen import PASSWORD, dataset_sizes
+
+
+class Scenario:
+    """A named request; ``make_request(rng)`` returns ``(method, url, form data)``."""
+
+    def __init__(self, name, make_request):
+        self.name = name
+        self.make_request = make_request
+
+
+def scenarios(sizes):
+    tweets = sizes['tweets']
+
+    def popular_tweet(rng):
+        # Reads concentrate on a small set of tweets, like real traffic
+        return min(tweets, int(rng.paretovariate(1.2)))
+
+    return [
+        Scenario('home', lambda rng: ('GET', '/main/', None)),
+        Scenario('home_search', lambda rng: ('GET', f"/main/?q={rng.choice(('music', 'coffee', 'game'))}", None)),
+        Scenario('home_hashtag', lambda rng: ('GET', f"/main/?q=%23{rng.choice(('news', 'tech', 'food'))}", None)),
+        Scenario('home_by_likes', lambda rng: ('GET', '/main/?sort_by=likes', None)),
+        Scenario('view_tweet', lambda rng: ('GET', f'/tweets/tweet/{popular_tweet(rng)}', None)),
+        Scenario('like_tweet', lambda rng: ('POST', f'/tweets/tweet/{rng.randint(1, tweets)}/like', {})),
+        Scenario('new_tweet', lambda rng: ('POST', '/tweets/tweet/new', {'content': f'benchmark tweet {rng.random()}'})),
+        Scenario('api_timeline', lambda rng: ('GET', '/api/timeline', None)),
+    ]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+
+
+def make_app(directory):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ['ENRICHMENT_WORKERS'] = '0'  # measure the request, not the background queue
+
+    from app import create_app
+    from app.tweets.model_cache import model_cache
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, MODEL_CACHE_PATH=None)
+    model_cache.configure(app.config['MODEL_CACHE_SIZE'], None)
+    return app
+
+
+def run_scenario(app, client, scenario, requests, warmup, seed):
+    from app.extensions import db
+
+    rng = random.Random(seed)
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def count(*args):
+        statements.append(1)
+
+    latencies, queries = [], []
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        started = time.perf_counter()
+        for i in range(warmup + requests):
+            method, url, data = scenario.make_request(rng)
+            statements.clear()
+            request_started = time.perf_counter()
+            response = client.open(url, method=method, data=data)
+            elapsed = time.perf_counter() - request_started
+            if response.status_code >= 400:
+                raise RuntimeError(f'{scenario.name}: {method} {url} returned {response.status_code}')
+            if i == warmup - 1:
+                started = time.perf_counter()
+            if i >= warmup:
+                latencies.append(elapsed * 1000)
+                queries.append(len(statements))
+        total = time.perf_counter() - started
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries_per_request': round(statistics.fmean(queries), 2),
+        'throughput_rps': round(requests / total, 1),
+    }
+
+
+def run_size(tweets, requests, warmup, seed, only=None):
+    from app.activity import activity_tracker
+    from app.extensions import db
+    from app.models import User
+    from benchmarks.datagen import generate
+
+    sizes = dataset_sizes(tweets)
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(directory)
+        with app.app_context():
+            db.create_all()
+            counts = generate(seed=seed, **sizes)
+            # A user without tweets of their own, so every like is allowed
+            user = User(username='benchmark', email='benchmark@example.com')
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+
+        client = app.test_client()
+        client.post('/auth/login', data={'username': 'benchmark', 'password': PASSWORD})
+        results = {}
+        for scenario in scenarios(sizes):
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = run_scenario(app, client, scenario, requests, warmup, seed)
+            print(f"{tweets:>8} {scenario.name:14} p50 {results[scenario.name]['p50_ms']:8.2f}ms  "
+                  f"p95 {results[scenario.name]['p95_ms']:8.2f}ms  "
+                  f"{results[scenario.name]['queries_per_request']:5.1f} queries  "
+                  f"{results[scenario.name]['throughput_rps']:8.1f} req/s", file=sys.stderr)
+        # Write buffered last_seen updates before the database goes away
+        activity_tracker.flush()
+        with app.app_context():
+            db.engine.dispose()
+    return {'data': counts, 'scenarios': results}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the main views on synthetic data.')
+    parser.add_argument('--sizes', default='1000,10000', help='comma-separated tweet counts')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scenario', action='append', help='run only these scenarios (repeatable)')
+    parser.add_argument('--model-delay-ms', type=float, default=0.0, help='simulated latency per model input')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    stub_models.install(args.model_delay_ms)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'seed': args.seed,
+            'requests': args.requests,
+        },
+        'results': {
+            size: run_size(int(size), args.requests, args.warmup, args.seed, args.scenario)
+            for size in args.sizes.split(',')
+        },
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Write throughput of the SQLite engine, stock settings vs. production pragmas.
+
+    python -m benchmarks.sqlite_writes [--threads 8] [--writes 200]
+
+Each writer thread posts comments the way ``view_tweet`` does: insert a
+comment and bump ``tweet.comment_count`` in one transaction.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.exc import OperationalError
+
+from app import database
+from app.extensions import db
+from app.models import User, Tweet, Comment
+
+TUNED = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_CACHE_SIZE_KB': 64 * 1024,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+}
+
+
+def make_engine(path, tuned):
+    if not tuned:
+        return create_engine(f'sqlite:///{path}')
+    engine = create_engine(f'sqlite:///{path}', **database.engine_options('sqlite://'))
+    database.apply_sqlite_pragmas(engine, database.sqlite_pragmas(TUNED))
+    return engine
+
+
+def seed(engine):
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__).values(
+            id=1, username='bench', email='bench@example.com', password_hash='x'))
+        connection.execute(insert(Tweet.__table__).values(
+            id=1, content='benchmark', user_id=1, created_at=datetime.utcnow()))
+
+
+def writer(engine, writes, errors):
+    for _ in range(writes):
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(Comment.__table__).values(
+                    content='hello', user_id=1, tweet_id=1, created_at=datetime.utcnow()))
+                connection.execute(update(Tweet.__table__).where(Tweet.__table__.c.id == 1)
+                                   .values(comment_count=Tweet.__table__.c.comment_count + 1))
+        except OperationalError:  # "database is locked"
+            errors.append(1)
+
+
+def run(tuned, threads, writes):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = make_engine(os.path.join(directory, 'bench.db'), tuned)
+        seed(engine)
+        errors = []
+        workers = [threading.Thread(target=writer, args=(engine, writes, errors)) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+    committed = threads * writes - len(errors)
+    return {'writes_per_sec': committed / elapsed, 'committed': committed, 'locked': len(errors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=200, help='transactions per thread')
+    args = parser.parse_args()
+
+    for label, tuned in (('default', False), ('tuned', True)):
+        result = run(tuned, args.threads, args.writes)
+        print(f"{label:8} {result['writes_per_sec']:8.0f} writes/s  "
+              f"committed={result['committed']}  locked={result['locked']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Deterministic stand-ins for the HuggingFace pipelines.
+
+``install()`` swaps ``app.tweets.inference.load_pipeline`` for a factory of
+stubs with the same call signature and output shape, so benchmarks run
+without network access, model downloads or GPU, and produce identical
+results on every run.
+"""
+import hashlib
+import time
+
+from app.tweets import inference
+from app.tweets.model_manager import model_manager
+
+_original_load_pipeline = inference.load_pipeline
+
+
+def _digest(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), 'big')
+
+
+class StubPipeline:
+    def __init__(self, task, model, delay_ms=0.0):
+        self.task = task
+        self.model = model
+        self.delay = delay_ms / 1000
+
+    def __call__(self, inputs, **kwargs):
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        if self.delay:
+            time.sleep(self.delay * len(texts))
+        outputs = [self.run(text) for text in texts]
+        return outputs if isinstance(inputs, list) else outputs[0]
+
+    def run(self, text):
+        if self.task == 'sentiment-analysis':
+            return {'label': 'POSITIVE' if _digest(text) % 2 else 'NEGATIVE', 'score': 0.99}
+        if text.startswith('generate hashtags: '):
+            words = [w for w in text[len('generate hashtags: '):].lower().split() if w.isalpha()]
+            return {'generated_text': ' '.join(f'#{w}' for w in sorted(set(words), key=_digest)[:3])}
+        # Grammar correction: capitalize and terminate the sentence
+        text = text.strip()
+        return {'generated_text': text[:1].upper() + text[1:] + ('' if text.endswith('.') else '.')}
+
+
+def install(delay_ms=0.0):
+    """Route every pipeline through the stubs; ``delay_ms`` simulates model latency per input."""
+    inference.load_pipeline = lambda task, model, backend='pytorch': StubPipeline(task, model, delay_ms)
+    _reset_loaded()
+
+
+def uninstall():
+    inference.load_pipeline = _original_load_pipeline
+    _reset_loaded()
+
+
+def _reset_loaded():
+    model_manager.unload_all()
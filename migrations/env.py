@@ -80,6 +80,16 @@ def run_migrations_online():
 
     """
 
+    # the full-text index (SQLite tweet_fts and its shadow tables, MySQL
+    # FULLTEXT index) is managed by hand-written migrations, so keep
+    # autogenerate from dropping it
+    def include_name(name, type_, parent_names):
+        if type_ == 'table':
+            return not name.startswith('tweet_fts')
+        if type_ == 'index':
+            return name != 'ix_tweet_content_fulltext'
+        return True
+
     # this callback is used to prevent an auto-migration from being generated
     # when there are no changes to the schema
     # reference: http://alembic.zzzcomputing.com/en/latest/cookbook.html
@@ -93,6 +103,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
 
     connectable = get_engine()
 
@@ -0,0 +1,55 @@
+"""Add full-text index on tweet content
+
+Revision ID: 5e7d2c8a9b13
+Revises: a3c9e5b1f2d4
+Create Date: 2026-10-18 11:03:27.581940
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7d2c8a9b13'
+down_revision = 'a3c9e5b1f2d4'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tweet_fts USING fts5("
+    "content, content='tweet', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS tweet_fts_ai AFTER INSERT ON tweet BEGIN "
+    "INSERT INTO tweet_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS tweet_fts_ad AFTER DELETE ON tweet BEGIN "
+    "INSERT INTO tweet_fts(tweet_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS tweet_fts_au AFTER UPDATE OF content ON tweet BEGIN "
+    "INSERT INTO tweet_fts(tweet_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO tweet_fts(rowid, content) VALUES (new.id, new.content); END",
+    # Index the tweets that already exist
+    "INSERT INTO tweet_fts(tweet_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS tweet_fts_au",
+    "DROP TRIGGER IF EXISTS tweet_fts_ad",
+    "DROP TRIGGER IF EXISTS tweet_fts_ai",
+    "DROP TABLE IF EXISTS tweet_fts",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect in ('mysql', 'mariadb'):
+        op.create_index('ix_tweet_content_fulltext', 'tweet', ['content'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect in ('mysql', 'mariadb'):
+        op.drop_index('ix_tweet_content_fulltext', table_name='tweet')
@@ -0,0 +1,64 @@
+"""Add hashtag and tweet_hashtag tables
+
+Revision ID: 8f41b6d0c7e2
+Revises: 5e7d2c8a9b13
+Create Date: 2026-10-18 11:47:09.316552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f41b6d0c7e2'
+down_revision = '5e7d2c8a9b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('hashtag',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tag')
+    )
+    op.create_table('tweet_hashtag',
+    sa.Column('tweet_id', sa.Integer(), nullable=False),
+    sa.Column('hashtag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['hashtag_id'], ['hashtag.id'], ),
+    sa.ForeignKeyConstraint(['tweet_id'], ['tweet.id'], ),
+    sa.PrimaryKeyConstraint('tweet_id', 'hashtag_id')
+    )
+    op.create_index('ix_tweet_hashtag_hashtag_id_tweet_id', 'tweet_hashtag', ['hashtag_id', 'tweet_id'], unique=False)
+
+    # Backfill from the space-joined Tweet.hashtags strings
+    bind = op.get_bind()
+    tweet = sa.table('tweet', sa.column('id'), sa.column('hashtags'))
+    hashtag = sa.table('hashtag', sa.column('id'), sa.column('tag'))
+    tweet_hashtag = sa.table('tweet_hashtag', sa.column('tweet_id'), sa.column('hashtag_id'))
+
+    links = []
+    tags = set()
+    rows = bind.execute(sa.select(tweet.c.id, tweet.c.hashtags).where(tweet.c.hashtags.isnot(None)))
+    for tweet_id, text in rows:
+        seen = set()
+        for tag in text.split():
+            tag = tag.strip().lstrip('#').lower()
+            if tag and len(tag) <= 50 and tag not in seen:
+                seen.add(tag)
+                links.append((tweet_id, tag))
+        tags |= seen
+
+    if tags:
+        op.bulk_insert(hashtag, [{'tag': tag} for tag in sorted(tags)])
+        ids = dict((tag, tag_id) for tag_id, tag in bind.execute(sa.select(hashtag.c.id, hashtag.c.tag)))
+        op.bulk_insert(tweet_hashtag, [
+            {'tweet_id': tweet_id, 'hashtag_id': ids[tag]} for tweet_id, tag in links
+        ])
+
+
+def downgrade():
+    op.drop_index('ix_tweet_hashtag_hashtag_id_tweet_id', table_name='tweet_hashtag')
+    op.drop_table('tweet_hashtag')
+    op.drop_table('hashtag')
@@ -0,0 +1,43 @@
+"""Add like_count and comment_count counters to Tweet
+
+Revision ID: a3c9e5b1f2d4
+Revises: 46e8c1f17aea
+Create Date: 2026-10-18 10:12:41.204317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e5b1f2d4'
+down_revision = '46e8c1f17aea'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index(batch_op.f('ix_tweet_like_count'), ['like_count'], unique=False)
+        batch_op.create_index(batch_op.f('ix_tweet_comment_count'), ['comment_count'], unique=False)
+
+    # Backfill from the existing rows
+    tweet = sa.table('tweet', sa.column('id'), sa.column('like_count'), sa.column('comment_count'))
+    like = sa.table('like', sa.column('tweet_id'))
+    comment = sa.table('comment', sa.column('tweet_id'))
+    op.execute(tweet.update().values(
+        like_count=sa.select(sa.func.count()).select_from(like)
+        .where(like.c.tweet_id == tweet.c.id).scalar_subquery(),
+        comment_count=sa.select(sa.func.count()).select_from(comment)
+        .where(comment.c.tweet_id == tweet.c.id).scalar_subquery(),
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tweet_comment_count'))
+        batch_op.drop_index(batch_op.f('ix_tweet_like_count'))
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('like_count')
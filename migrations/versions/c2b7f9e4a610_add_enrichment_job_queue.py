@@ -0,0 +1,60 @@
+"""Add enrichment job queue and Tweet.enrichment_status
+
+Revision ID: c2b7f9e4a610
+Revises: 8f41b6d0c7e2
+Create Date: 2026-10-18 12:35:52.740118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2b7f9e4a610'
+down_revision = '8f41b6d0c7e2'
+branch_labels = None
+depends_on = None
+
+# The FTS triggers of 5e7d2c8a9b13, which SQLite drops when it rebuilds the tweet table
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS tweet_fts_ai AFTER INSERT ON tweet BEGIN "
+    "INSERT INTO tweet_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS tweet_fts_ad AFTER DELETE ON tweet BEGIN "
+    "INSERT INTO tweet_fts(tweet_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS tweet_fts_au AFTER UPDATE OF content ON tweet BEGIN "
+    "INSERT INTO tweet_fts(tweet_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO tweet_fts(rowid, content) VALUES (new.id, new.content); END",
+]
+
+
+def upgrade():
+    op.create_table('enrichment_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tweet_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(length=255), nullable=True),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['tweet_id'], ['tweet.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tweet_id')
+    )
+    op.create_index('ix_enrichment_job_status_run_after', 'enrichment_job', ['status', 'run_after'], unique=False)
+
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('enrichment_status', sa.String(length=10), server_default='done', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.drop_column('enrichment_status')
+
+    # SQLite rebuilds the tweet table to drop a column, which drops its triggers
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+
+    op.drop_index('ix_enrichment_job_status_run_after', table_name='enrichment_job')
+    op.drop_table('enrichment_job')
@@ -0,0 +1,46 @@
+"""Add hot path indexes and unique (user_id, tweet_id) on like
+
+Revision ID: f3d8a2c6b94e
+Revises: e6a1d3f85c27
+Create Date: 2026-10-18 14:46:33.118207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3d8a2c6b94e'
+down_revision = 'e6a1d3f85c27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tweet = sa.table('tweet', sa.column('id'), sa.column('like_count'))
+    like = sa.table('like', sa.column('id'), sa.column('user_id'), sa.column('tweet_id'))
+
+    # Remove duplicate likes left by the old read-then-write toggle, keeping
+    # the first one, so the unique index can be built
+    keep = sa.select(sa.func.min(like.c.id)).group_by(like.c.user_id, like.c.tweet_id)
+    bind = op.get_bind()
+    keep_ids = {row[0] for row in bind.execute(keep)}
+    duplicate_ids = [row[0] for row in bind.execute(sa.select(like.c.id)) if row[0] not in keep_ids]
+    if duplicate_ids:
+        op.execute(like.delete().where(like.c.id.in_(duplicate_ids)))
+        op.execute(tweet.update().values(
+            like_count=sa.select(sa.func.count()).select_from(like)
+            .where(like.c.tweet_id == tweet.c.id).scalar_subquery()
+        ))
+
+    op.create_index('uq_like_user_id_tweet_id', 'like', ['user_id', 'tweet_id'], unique=True)
+    op.create_index('ix_tweet_created_at', 'tweet', ['created_at'], unique=False)
+    op.create_index('ix_tweet_user_id_created_at', 'tweet', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_comment_tweet_id_created_at', 'comment', ['tweet_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_comment_tweet_id_created_at', table_name='comment')
+    op.drop_index('ix_tweet_user_id_created_at', table_name='tweet')
+    op.drop_index('ix_tweet_created_at', table_name='tweet')
+    op.drop_index('uq_like_user_id_tweet_id', table_name='like')
@@ -0,0 +1,65 @@
+import pytest
+
+from app.activity import activity_tracker
+from app.extensions import db
+from app.fragments import fragment_cache
+from app.models import User
+from app.trending import trending
+from app.tweets.model_cache import model_cache
+
+USERNAMES = ('alice', 'bobby', 'carol')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'tweets.db'}")
+    monkeypatch.setenv('ENRICHMENT_WORKERS', '0')
+    from app import create_app
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, UPLOAD_FOLDER=str(tmp_path / 'uploads'),
+                      MODEL_CACHE_PATH=str(tmp_path / 'model_cache.db'))
+    model_cache.configure(app.config['MODEL_CACHE_SIZE'], app.config['MODEL_CACHE_PATH'])
+    with app.app_context():
+        db.create_all()
+    fragment_cache.clear()
+    yield app
+    # Write what the trackers buffered now, not at exit after the tables are gone
+    activity_tracker.flush()
+    trending.flush()
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def users(app):
+    """User ids by name; every password is ``secret1``."""
+    with app.app_context():
+        users = []
+        for name in USERNAMES:
+            user = User(username=name, email=f'{name}@example.com')
+            user.set_password('secret1')
+            users.append(user)
+        db.session.add_all(users)
+        db.session.commit()
+        return {user.username: user.id for user in users}
+
+
+@pytest.fixture
+def client(app, users):
+    """A test client logged in as alice."""
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'alice', 'password': 'secret1'})
+    return client
+
+
+@pytest.fixture
+def stub_models():
+    """Deterministic stand-ins for the HuggingFace pipelines."""
+    from benchmarks import stub_models
+
+    stub_models.install()
+    yield stub_models
+    stub_models.uninstall()
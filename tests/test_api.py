@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+from werkzeug.http import http_date
+
+from app.extensions import db
+from app.models import Tweet, Watermark
+
+
+@pytest.fixture
+def tweet(app, users):
+    with app.app_context():
+        tweet = Tweet(content='First tweet', user_id=users['bobby'], sentiment='NEUTRAL', hashtags='')
+        db.session.add(tweet)
+        db.session.commit()
+        return tweet.id
+
+
+def set_watermark_time(app, updated_at):
+    with app.app_context():
+        db.session.execute(update(Watermark).values(updated_at=updated_at))
+        db.session.commit()
+
+
+def add_tweet(app, users, content):
+    with app.app_context():
+        db.session.add(Tweet(content=content, user_id=users['bobby'], sentiment='NEUTRAL', hashtags=''))
+        db.session.commit()
+
+
+def test_etag_revalidation(app, users, client, tweet):
+    response = client.get('/api/timeline')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    assert client.get('/api/timeline', headers={'If-None-Match': etag}).status_code == 304
+    # Another query string is another representation
+    assert client.get('/api/timeline?per_page=5', headers={'If-None-Match': etag}).status_code == 200
+
+    add_tweet(app, users, 'Second tweet')
+    response = client.get('/api/timeline', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert [item['content'] for item in response.get_json()['items']][:2] == ['Second tweet', 'First tweet']
+
+
+def test_if_modified_since_after_the_second_is_over(app, users, client, tweet):
+    set_watermark_time(app, datetime.utcnow().replace(microsecond=0) - timedelta(minutes=1))
+    last_modified = client.get('/api/timeline').headers['Last-Modified']
+    assert client.get('/api/timeline', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    add_tweet(app, users, 'Second tweet')
+    assert client.get('/api/timeline', headers={'If-Modified-Since': last_modified}).status_code == 200
+
+
+def test_no_last_modified_within_the_changing_second(app, users, client, tweet):
+    # A watermark from the current second, set ahead so the test cannot race the clock
+    set_watermark_time(app, datetime.utcnow().replace(microsecond=0) + timedelta(minutes=1))
+    response = client.get('/api/timeline')
+    assert 'Last-Modified' not in response.headers
+    since = http_date(datetime.now(timezone.utc) + timedelta(minutes=2))
+    assert client.get('/api/timeline', headers={'If-Modified-Since': since}).status_code == 200
+
+
+def test_tampered_cursor_is_rejected(client, tweet):
+    response = client.get('/api/timeline?cursor=not-a-cursor')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Comment, Like, Tweet
+
+
+@pytest.fixture
+def tweet(app, users):
+    with app.app_context():
+        tweet = Tweet(content='Counted tweet', user_id=users['bobby'], sentiment='NEUTRAL', hashtags='')
+        db.session.add(tweet)
+        db.session.commit()
+        return tweet.id
+
+
+def counters(app, tweet_id):
+    with app.app_context():
+        return tuple(db.session.execute(
+            select(Tweet.like_count, Tweet.comment_count).where(Tweet.id == tweet_id)
+        ).one())
+
+
+def comment_ids(app):
+    with app.app_context():
+        return db.session.execute(select(Comment.id).order_by(Comment.id)).scalars().all()
+
+
+def test_comments_keep_the_counter(app, client, tweet):
+    for text in ('first', 'second'):
+        client.post(f'/tweets/tweet/{tweet}', data={'content': text})
+    assert counters(app, tweet) == (0, 2)
+
+    client.post(f'/tweets/comment/{comment_ids(app)[0]}/delete')
+    assert counters(app, tweet) == (0, 1)
+
+
+def test_an_invalid_comment_leaves_the_counter(app, client, tweet):
+    client.post(f'/tweets/tweet/{tweet}', data={'content': ''})
+    assert counters(app, tweet) == (0, 0)
+    assert comment_ids(app) == []
+
+
+def test_someone_elses_comment_cannot_be_deleted(app, users, client, tweet):
+    with app.app_context():
+        db.session.add(Comment(content='by carol', tweet_id=tweet, user_id=users['carol']))
+        db.session.commit()
+    # alice wrote neither the comment nor the tweet
+    assert client.post(f'/tweets/comment/{comment_ids(app)[0]}/delete').status_code == 403
+    assert len(comment_ids(app)) == 1
+
+
+def test_recount_repairs_drifted_counters(app, users, tweet):
+    with app.app_context():
+        db.session.add_all([
+            Like(user_id=users['alice'], tweet_id=tweet),
+            Like(user_id=users['carol'], tweet_id=tweet),
+            Comment(content='one', tweet_id=tweet, user_id=users['alice']),
+        ])
+        other = Tweet(content='Never liked', user_id=users['alice'], sentiment='NEUTRAL', hashtags='',
+                      like_count=5, comment_count=3)
+        db.session.add(other)
+        db.session.commit()
+        other = other.id
+    assert counters(app, tweet) == (0, 0)
+
+    result = app.test_cli_runner().invoke(args=['tweets', 'recount'])
+    assert result.exit_code == 0, result.output
+    assert 'for 2 tweets' in result.output
+    assert counters(app, tweet) == (2, 1)
+    assert counters(app, other) == (0, 0)
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import EnrichmentJob, Tweet
+from app.tweets.batching import BATCHERS
+from app.tweets.enrichment import enqueue_enrichment, enrichment_worker
+
+
+@pytest.fixture
+def batchers():
+    saved = {name: batcher.max_wait_ms for name, batcher in BATCHERS.items()}
+    for batcher in BATCHERS.values():
+        # Wide enough that the jobs' calls always meet in one batch
+        batcher.max_wait_ms = 500
+        batcher.reset_stats()
+    yield BATCHERS
+    for name, max_wait_ms in saved.items():
+        BATCHERS[name].max_wait_ms = max_wait_ms
+
+
+def test_one_worker_batches_its_claimed_jobs(app, users, stub_models, batchers):
+    with app.app_context():
+        for i in range(6):
+            tweet = Tweet(content=f'good tweet number {i}', user_id=users['alice'])
+            enqueue_enrichment(tweet)
+            db.session.add(tweet)
+        db.session.commit()
+
+        assert enrichment_worker.run_once() == 6
+        db.session.expire_all()
+        tweets = db.session.execute(select(Tweet)).scalars().all()
+        assert {(t.enrichment_status, t.enrichment_path) for t in tweets} == {('done', 'models')}
+        assert db.session.execute(select(EnrichmentJob)).first() is None
+
+    for name in ('grammar', 'sentiment', 'hashtags'):
+        stats = batchers[name].stats()
+        assert stats['items'] == 6
+        assert stats['batches'] < 6, name
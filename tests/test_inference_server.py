@@ -0,0 +1,105 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from app.extensions import db
+from app.models import Tweet
+from app.tweets import inference
+from app.tweets.enrichment import enrich_text
+from app.tweets.importer import TweetImporter
+from app.tweets.inference_server import InferenceClient, InferenceServerError, recv_message, send_message
+
+
+class FakeServer:
+    """Answers every text with its length after ``delay`` seconds."""
+
+    def __init__(self, path, delay=0.0):
+        self.path = str(path)
+        self.delay = delay
+        self.requests = []
+        self._sock = socket.socket(socket.AF_UNIX)
+        self._sock.bind(self.path)
+        self._sock.listen(8)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while (request := recv_message(conn)) is not None:
+                self.requests.append(request)
+                time.sleep(self.delay)
+                try:
+                    send_message(conn, {'results': [len(text) for text in request['texts']]})
+                except OSError:
+                    return
+
+    def close(self):
+        self._sock.close()
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = FakeServer(tmp_path / 'inference.sock')
+    yield server
+    server.close()
+
+
+def test_large_batches_go_out_in_chunks(server):
+    client = InferenceClient(f'unix://{server.path}', batch_size=4)
+    texts = ['a' * i for i in range(10)]
+    assert client.run('sentiment', texts) == list(range(10))
+    assert [len(request['texts']) for request in server.requests] == [4, 4, 2]
+
+
+def test_timeout_neither_retries_nor_trips_the_breaker(server):
+    client = InferenceClient(f'unix://{server.path}', timeout=0.1)
+    client.run('sentiment', ['warm'])  # leaves a pooled connection
+    server.delay = 0.5
+    with pytest.raises(InferenceServerError):
+        client.run('sentiment', ['slow'])
+    stats = client.stats()
+    assert (stats['connects'], stats['timeouts'], stats['failures']) == (1, 1, 0)
+    assert client.available()
+
+
+def test_unreachable_server_is_skipped_for_a_while(tmp_path):
+    client = InferenceClient(f"unix://{tmp_path / 'missing.sock'}", retry_after=60)
+    for _ in range(2):
+        with pytest.raises(InferenceServerError):
+            client.run('sentiment', ['x'])
+    stats = client.stats()
+    assert (stats['failures'], stats['skipped']) == (1, 1)
+    assert not client.available()
+
+
+@pytest.fixture
+def down_server(app, tmp_path):
+    inference.use_server(InferenceClient(f"unix://{tmp_path / 'missing.sock'}"))
+    yield
+    inference.use_server(None)
+
+
+def test_enrichment_falls_back_when_the_server_is_down(app, down_server, stub_models):
+    corrected, sentiment, hashtags, path = enrich_text('Great match today #football')
+    assert path == 'fallback:grammar,sentiment,hashtags'
+    assert corrected == 'Great match today #football'
+    assert hashtags[0] == '#football'
+
+
+def test_import_falls_back_when_the_server_is_down(app, users, down_server, stub_models, tmp_path):
+    path = tmp_path / 'tweets.jsonl'
+    path.write_text('{"username": "alice", "content": "Great match today #football"}\n')
+    with app.app_context():
+        assert TweetImporter().run(str(path))['imported'] == 1
+        tweet = db.session.get(Tweet, 1)
+        assert (tweet.enrichment_status, tweet.enrichment_path) == ('done', 'fallback:grammar,sentiment,hashtags')
+        assert tweet.hashtags.startswith('#football')
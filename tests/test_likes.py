@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.database import insert_ignore
+from app.extensions import db
+from app.models import Like, Tweet
+
+
+@pytest.fixture
+def tweet(app, users):
+    with app.app_context():
+        tweet = Tweet(content='Likeable tweet', user_id=users['bobby'], sentiment='NEUTRAL', hashtags='')
+        db.session.add(tweet)
+        db.session.commit()
+        return tweet.id
+
+
+def like_state(app, tweet_id):
+    """``(like_count, number of Like rows)`` for the tweet."""
+    with app.app_context():
+        return (
+            db.session.scalar(select(Tweet.like_count).where(Tweet.id == tweet_id)),
+            db.session.scalar(select(func.count(Like.id)).where(Like.tweet_id == tweet_id)),
+        )
+
+
+def test_like_toggles(app, client, tweet):
+    assert client.post(f'/tweets/tweet/{tweet}/like').status_code == 302
+    assert like_state(app, tweet) == (1, 1)
+    client.post(f'/tweets/tweet/{tweet}/like')
+    assert like_state(app, tweet) == (0, 0)
+    client.post(f'/tweets/tweet/{tweet}/like')
+    assert like_state(app, tweet) == (1, 1)
+
+
+def test_likes_from_several_users_add_up(app, client, tweet):
+    client.post(f'/tweets/tweet/{tweet}/like')
+    carol = app.test_client()
+    carol.post('/auth/login', data={'username': 'carol', 'password': 'secret1'})
+    carol.post(f'/tweets/tweet/{tweet}/like')
+    assert like_state(app, tweet) == (2, 2)
+
+
+def test_own_tweet_cannot_be_liked(app, users, client):
+    with app.app_context():
+        own = Tweet(content='Mine', user_id=users['alice'], sentiment='NEUTRAL', hashtags='')
+        db.session.add(own)
+        db.session.commit()
+        own = own.id
+    assert client.post(f'/tweets/tweet/{own}/like').status_code == 403
+    assert like_state(app, own) == (0, 0)
+
+
+def test_missing_tweet(client):
+    assert client.post('/tweets/tweet/999/like').status_code == 404
+
+
+def test_one_like_per_user_and_tweet(app, users, tweet):
+    with app.app_context():
+        db.session.add(Like(user_id=users['alice'], tweet_id=tweet))
+        db.session.commit()
+        # What a second request of a double click does after a concurrent insert
+        assert db.session.execute(insert_ignore(Like).values(user_id=users['alice'], tweet_id=tweet)).rowcount == 0
+        db.session.rollback()
+        db.session.add(Like(user_id=users['alice'], tweet_id=tweet))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
@@ -0,0 +1,97 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import Tweet
+from app.pagination import MAX_INT64, decode_cursor, encode_cursor
+
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('key, row_id, key_is_datetime', [
+    (datetime(2026, 1, 2, 3, 4, 5, 6), 7, True),
+    (12, 7, False),
+    (0.25, MAX_INT64, False),
+    (-3, 1, False),
+])
+def test_cursor_round_trip(key, row_id, key_is_datetime):
+    assert decode_cursor(encode_cursor(key, row_id), key_is_datetime) == (key, row_id)
+
+
+@pytest.mark.parametrize('cursor, key_is_datetime', [
+    ('!!!', False),
+    (raw_cursor('not json'), False),
+    (raw_cursor('[1, 2, 3]'), False),
+    (raw_cursor('{"key": 1}'), False),
+    (raw_cursor('[[1], 1]'), False),
+    (raw_cursor('[{"a": 1}, 1]'), False),
+    (raw_cursor('["5", 1]'), False),
+    (raw_cursor('[true, 1]'), False),
+    (raw_cursor('[NaN, 1]'), False),
+    (raw_cursor('[Infinity, 1]'), False),
+    (raw_cursor(f'[1, {MAX_INT64 + 1}]'), False),
+    (raw_cursor(f'[{-2 ** 64}, 1]'), False),
+    (raw_cursor('[1, 1.5]'), False),
+    (raw_cursor('[1, "1"]'), False),
+    (raw_cursor('[1, true]'), False),
+    (raw_cursor('[1, null]'), False),
+    (raw_cursor('["yesterday", 1]'), True),
+    (raw_cursor('[5, 1]'), True),
+])
+def test_malformed_cursors_are_rejected(cursor, key_is_datetime):
+    assert decode_cursor(cursor, key_is_datetime) is None
+
+
+@pytest.fixture
+def tweets(app, users):
+    # Pairs of equal like counts, so pages break inside ties
+    with app.app_context():
+        tweets = [
+            Tweet(content=f'tweet {i}', user_id=users['bobby'], like_count=i // 2,
+                  created_at=datetime(2026, 1, 1, 0, i), sentiment='NEUTRAL', hashtags='')
+            for i in range(7)
+        ]
+        db.session.add_all(tweets)
+        db.session.commit()
+        return [tweet.id for tweet in tweets]
+
+
+def walk(client, way, **params):
+    pages = []
+    while True:
+        data = client.get('/api/timeline', query_string={'per_page': 3, **params}).get_json()
+        pages.append([item['id'] for item in data['items']])
+        cursor = data[f'{way}_cursor']
+        if cursor is None:
+            return pages, data
+        params = {**params, 'cursor': cursor, 'direction': way}
+
+
+@pytest.mark.parametrize('sort', [{}, {'sort_by': 'likes'}, {'sort_by': 'likes', 'order': 'asc'}])
+def test_cursors_walk_every_tweet_once(client, tweets, sort):
+    pages, last = walk(client, 'next', **sort)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    walked = [tweet_id for page in pages for tweet_id in page]
+    assert sorted(walked) == sorted(tweets)
+
+    # And back again from the last page
+    back, _ = walk(client, 'prev', **sort, cursor=last['prev_cursor'], direction='prev')
+    assert back == pages[-2::-1]
+
+
+def test_tampered_cursor_on_the_html_timeline_shows_the_first_page(client, tweets):
+    response = client.get('/main/', query_string={'per_page': 3, 'cursor': raw_cursor('[[1], 1]')})
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert all(f'tweet {i}' in page for i in (6, 5, 4))
+    assert 'tweet 3' not in page
+
+
+def test_tampered_cursor_on_the_api_is_a_client_error(client, tweets):
+    response = client.get('/api/timeline', query_string={'cursor': raw_cursor(f'[1, {MAX_INT64 + 1}]')})
+    assert response.status_code == 400
@@ -0,0 +1,74 @@
+"""The tweet list pages must cost the same number of queries however long they are."""
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, select
+
+from app.extensions import db
+from app.fragments import fragment_cache
+from app.models import Tweet, Comment
+
+TWEETS = 30
+
+
+@pytest.fixture(autouse=True)
+def tweets(app, users):
+    with app.app_context():
+        author_ids = list(users.values())
+        start = datetime.utcnow() - timedelta(hours=1)
+        tweets = [
+            Tweet(content=f'tweet {i}', user_id=author_ids[i % len(author_ids)], sentiment='NEUTRAL', hashtags='',
+                  created_at=start + timedelta(seconds=i))
+            for i in range(TWEETS)
+        ]
+        db.session.add_all(tweets)
+        db.session.flush()
+        db.session.add_all(
+            Comment(content=f'comment {i}', user_id=author_ids[i % len(author_ids)], tweet_id=tweets[0].id)
+            for i in range(10)
+        )
+        db.session.commit()
+
+
+@contextmanager
+def count_queries(app):
+    statements = []
+    thread = threading.get_ident()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Background threads (trending sync, last_seen flushes) are not the request's queries
+        if threading.get_ident() == thread:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def queries_for(app, client, url):
+    fragment_cache.clear()  # render every card, not cached copies
+    with count_queries(app) as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize('path', ['/main/', '/main/?sort_by=likes', '/main/profile'])
+def test_list_query_count_does_not_depend_on_page_size(app, client, path):
+    separator = '&' if '?' in path else '?'
+    client.get(path)  # warm the per-process caches (trending, user lookups)
+    counts = {size: queries_for(app, client, f'{path}{separator}per_page={size}') for size in (1, 5, TWEETS)}
+    assert len(set(counts.values())) == 1, counts
+
+
+def test_tweet_query_count_does_not_depend_on_comment_count(app, client):
+    with app.app_context():
+        busy, quiet = db.session.execute(select(Tweet.id).order_by(Tweet.id).limit(2)).scalars()
+    client.get(f'/tweets/tweet/{busy}')
+    assert queries_for(app, client, f'/tweets/tweet/{busy}') == queries_for(app, client, f'/tweets/tweet/{quiet}')
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Tweet
+from app.tweets.reenrich import Reenricher
+
+PATHS = ['models', 'fallback:grammar', 'fallback:grammar,sentiment', 'fallback:hashtags', 'fallback:sentiment']
+
+
+@pytest.fixture
+def tweets(app, users, stub_models):
+    with app.app_context():
+        db.session.add_all(
+            Tweet(content=f'Good tweet number {i}.', user_id=users['alice'], sentiment='NEUTRAL', hashtags='',
+                  enrichment_status='done', enrichment_path=path)
+            for i, path in enumerate(PATHS)
+        )
+        db.session.commit()
+
+
+def paths(app):
+    with app.app_context():
+        return db.session.execute(select(Tweet.enrichment_path).order_by(Tweet.id)).scalars().all()
+
+
+def reenrich(app, **options):
+    with app.app_context():
+        return Reenricher(**options).run()
+
+
+def test_degraded_reaches_a_fixed_point(app, tweets):
+    result = reenrich(app, degraded=True)
+    assert (result['processed'], result['updated']) == (3, 3)
+    assert paths(app) == ['models', 'fallback:grammar', 'fallback:grammar', 'models', 'models']
+    # Grammar fallbacks cannot be redone, so they are not picked up again
+    assert reenrich(app, degraded=True)['processed'] == 0
+
+
+def test_degraded_selects_only_the_models_re_run(app, tweets):
+    assert reenrich(app, models=['hashtags'], degraded=True)['processed'] == 1
+    assert paths(app) == ['models', 'fallback:grammar', 'fallback:grammar,sentiment', 'models', 'fallback:sentiment']
+
+
+def test_all_enriched_tweets_without_degraded(app, tweets):
+    with app.app_context():
+        db.session.get(Tweet, 1).enrichment_status = 'pending'
+        db.session.commit()
+    result = reenrich(app, models=['sentiment'])
+    assert result['processed'] == len(PATHS) - 1
+    with app.app_context():
+        assert db.session.get(Tweet, 1).sentiment == 'NEUTRAL'
+        assert {t.sentiment for t in Tweet.query.filter(Tweet.id > 1)} <= {'POSITIVE', 'NEGATIVE'}